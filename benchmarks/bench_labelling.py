@@ -0,0 +1,34 @@
+from simpler.labelling import format_to_base_10, format_array_to_base_10
+from common import SCALES, skip_above, make_floats
+
+
+class FormatToBase10:
+    params = SCALES
+    param_names = ["n"]
+    max_scale = 10**6  # a Python call per value
+
+    def setup(self, n):
+        skip_above(n, self.max_scale)
+        self.values = make_floats(n).tolist()
+
+    def time_format_to_base_10(self, n):
+        [format_to_base_10(value, prefix="$") for value in self.values]
+
+    def peakmem_format_to_base_10(self, n):
+        [format_to_base_10(value, prefix="$") for value in self.values]
+
+
+class FormatArrayToBase10:
+    params = SCALES
+    param_names = ["n"]
+    max_scale = 10**7  # the U dtype result is ~10 bytes x 4 per row
+
+    def setup(self, n):
+        skip_above(n, self.max_scale)
+        self.arr = make_floats(n)
+
+    def time_format_array_to_base_10(self, n):
+        format_array_to_base_10(self.arr, prefix="$")
+
+    def peakmem_format_array_to_base_10(self, n):
+        format_array_to_base_10(self.arr, prefix="$")
@@ -0,0 +1,123 @@
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+from simpler.simpler_pandas import (
+    make_bin_edges,
+    bin_series,
+    apply_labelling,
+    value_counts_pct,
+    flatten_multiindex,
+    to_datetime_helper,
+    check_series_is_ordered,
+)
+from simpler.labelling import format_to_base_10
+from common import SCALES, skip_above, make_month_strings
+
+
+class MakeBinEdges:
+    # n is the number of bins, not rows
+    params = [10**3, 10**4, 10**5, 10**6]
+    param_names = ["n"]
+
+    def setup(self, n):
+        self.desc = f"0 1 ... {n}"
+
+    def time_make_bin_edges(self, n):
+        make_bin_edges(self.desc)
+
+
+class BinAndLabel:
+    params = SCALES
+    param_names = ["n"]
+    max_scale = 10**8
+
+    def setup(self, n):
+        skip_above(n, self.max_scale)
+        rng = np.random.default_rng(0)
+        self.dist = pd.Series(rng.normal(scale=3, size=n))
+        self.bin_edges = make_bin_edges("-10 -9 ... 10")
+        self.binned = bin_series(self.dist, self.bin_edges)
+
+    def time_bin_series(self, n):
+        bin_series(self.dist, self.bin_edges)
+
+    def peakmem_bin_series(self, n):
+        bin_series(self.dist, self.bin_edges)
+
+    def time_apply_labelling(self, n):
+        apply_labelling(self.binned, format_fn=format_to_base_10, use_cache=False)
+
+    def peakmem_apply_labelling(self, n):
+        apply_labelling(self.binned, format_fn=format_to_base_10, use_cache=False)
+
+
+class ValueCountsPct:
+    params = SCALES
+    param_names = ["n"]
+    max_scale = 10**8
+
+    def setup(self, n):
+        skip_above(n, self.max_scale)
+        rng = np.random.default_rng(0)
+        self.ser = pd.Series(rng.zipf(1.5, size=n) % 10_000)
+
+    def time_value_counts_pct(self, n):
+        with contextlib.redirect_stdout(io.StringIO()):
+            value_counts_pct(self.ser)
+
+    def peakmem_value_counts_pct(self, n):
+        with contextlib.redirect_stdout(io.StringIO()):
+            value_counts_pct(self.ser)
+
+
+class FlattenMultiIndex:
+    # n is the number of columns, a wide pivot
+    params = [10**3, 10**4, 10**5, 10**6]
+    param_names = ["n"]
+
+    def setup(self, n):
+        index = pd.MultiIndex.from_product(
+            [[f"metric{i}" for i in range(n // 100)], [f"day{i}" for i in range(100)]]
+        )
+        self.df = pd.DataFrame(np.zeros((2, index.shape[0])), columns=index)
+
+    def time_flatten_multiindex(self, n):
+        flatten_multiindex(self.df)
+
+    def peakmem_flatten_multiindex(self, n):
+        flatten_multiindex(self.df)
+
+
+class ToDatetimeHelper:
+    params = SCALES
+    param_names = ["n"]
+    max_scale = 10**7
+
+    def setup(self, n):
+        skip_above(n, self.max_scale)
+        self.ser = make_month_strings(n)
+
+    def time_to_datetime_helper(self, n):
+        with contextlib.redirect_stdout(io.StringIO()):
+            to_datetime_helper(self.ser)
+
+    def peakmem_to_datetime_helper(self, n):
+        with contextlib.redirect_stdout(io.StringIO()):
+            to_datetime_helper(self.ser)
+
+
+class CheckSeriesIsOrdered:
+    params = SCALES
+    param_names = ["n"]
+    max_scale = 10**8
+
+    def setup(self, n):
+        skip_above(n, self.max_scale)
+        self.ser = pd.Series(np.arange(n))
+
+    def time_check_series_is_ordered(self, n):
+        check_series_is_ordered(self.ser)
+
+    def peakmem_check_series_is_ordered(self, n):
+        check_series_is_ordered(self.ser)
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import numpy as np
+from simpler.simpler_stats import (
+    calculate_ci,
+    calculate_bootstraps,
+    calculate_bootstrap_ci,
+    PoissonBootstrap,
+)
+from common import SCALES, skip_above
+
+REPEATS = 1000
+
+
+class Bootstraps:
+    params = SCALES
+    param_names = ["n"]
+    max_scale = 10**6  # 1000 repeats of n rows, 1e9 draws at 1e6
+
+    def setup(self, n):
+        skip_above(n, self.max_scale)
+        rng = np.random.default_rng(0)
+        self.arr = (rng.random(n) < 0.1).astype(np.float64)
+
+    def time_calculate_ci(self, n):
+        with contextlib.redirect_stdout(io.StringIO()):
+            calculate_ci(self.arr)
+
+    def time_calculate_bootstraps(self, n):
+        calculate_bootstraps(self.arr, repeats=REPEATS, agg_fn=np.mean, seed=0)
+
+    def peakmem_calculate_bootstraps(self, n):
+        calculate_bootstraps(self.arr, repeats=REPEATS, agg_fn=np.mean, seed=0)
+
+    def time_calculate_bootstrap_ci(self, n):
+        calculate_bootstrap_ci(self.arr, repeats=REPEATS, agg_fn=np.mean, seed=0)
+
+    def peakmem_calculate_bootstrap_ci(self, n):
+        calculate_bootstrap_ci(self.arr, repeats=REPEATS, agg_fn=np.mean, seed=0)
+
+
+class PoissonBootstrapUpdate:
+    params = SCALES
+    param_names = ["n"]
+    max_scale = 10**7
+
+    def setup(self, n):
+        skip_above(n, self.max_scale)
+        rng = np.random.default_rng(0)
+        self.arr = rng.random(n)
+
+    def time_poisson_bootstrap(self, n):
+        PoissonBootstrap(repeats=REPEATS, seed=0).update(self.arr).ci()
+
+    def peakmem_poisson_bootstrap(self, n):
+        PoissonBootstrap(repeats=REPEATS, seed=0).update(self.arr).ci()
+
+
+class BootstrapCounts:
+    """Binary flags take the multinomial counts path, only detection is O(n)"""
+
+    params = SCALES
+    param_names = ["n"]
+    max_scale = 10**8
+
+    def setup(self, n):
+        skip_above(n, self.max_scale)
+        rng = np.random.default_rng(0)
+        self.flag = (rng.random(n) < 0.1).astype(np.int8)
+
+    def time_calculate_bootstrap_ci_flag(self, n):
+        calculate_bootstrap_ci(self.flag, repeats=REPEATS, seed=0)
+
+    def peakmem_calculate_bootstrap_ci_flag(self, n):
+        calculate_bootstrap_ci(self.flag, repeats=REPEATS, seed=0)
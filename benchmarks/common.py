@@ -0,0 +1,30 @@
+"""Shared sizes and data for the asv style benchmarks in this folder
+
+Every benchmark class takes a row count `n` from `SCALES`. `setup` raises
+`NotImplementedError` (asv's "skip this parameter") beyond the class's
+`max_scale` so slow pure Python paths aren't run at 1e8 rows"""
+
+import numpy as np
+import pandas as pd
+
+SCALES = [10**3, 10**4, 10**5, 10**6, 10**7, 10**8]
+
+
+def skip_above(n, max_scale):
+    if n > max_scale:
+        raise NotImplementedError(f"{n} rows is above max_scale {max_scale}")
+
+
+def make_floats(n, seed=0):
+    """Values spread over many orders of magnitude, as format_to_base_10 sees"""
+    rng = np.random.default_rng(seed)
+    return rng.lognormal(mean=5, sigma=4, size=n)
+
+
+def make_month_strings(n, error_rate=0.001, seed=0):
+    """'Jan 2023' style strings with a few unparseable values"""
+    rng = np.random.default_rng(seed)
+    months = pd.date_range("2000-01-01", periods=240, freq="MS").strftime("%b %Y")
+    ser = pd.Series(months.to_numpy()[rng.integers(0, months.shape[0], n)])
+    ser[rng.random(n) < error_rate] = "not a date"
+    return ser
@@ -0,0 +1,145 @@
+"""Run the asv style benchmarks here without asv, save and compare baselines
+
+Benchmarks are classes in `bench_*.py` with `params`, a `setup(n)` and
+`time_*` / `peakmem_*` methods, so `asv run` can use them too. This runner
+reports the best of `--repeat` wall clock timings and the peak memory
+traced by `tracemalloc` (NumPy and pandas allocations are traced) for
+each benchmark and size up to `--max-scale`.
+
+python benchmarks/run_benchmarks.py --max-scale 1e6 --save benchmarks/results/before.json
+... upgrade pandas or change code ...
+python benchmarks/run_benchmarks.py --max-scale 1e6 --compare benchmarks/results/before.json
+
+Timings in a stored baseline only compare on the same machine, the
+environment (versions, platform) is saved alongside to check that."""
+
+import argparse
+import importlib
+import json
+import pathlib
+import platform
+import sys
+import timeit
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+BENCHMARK_DIR = pathlib.Path(__file__).parent
+
+
+def discover(pattern=None):
+    """Yield (name, class, method name) for every benchmark, optionally filtered
+    on a substring of 'module.Class.method'"""
+    sys.path.insert(0, str(BENCHMARK_DIR))
+    for path in sorted(BENCHMARK_DIR.glob("bench_*.py")):
+        module = importlib.import_module(path.stem)
+        for cls_name, cls in vars(module).items():
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            for method in sorted(vars(cls)):
+                if not method.startswith(("time_", "peakmem_")):
+                    continue
+                name = f"{path.stem}.{cls_name}.{method}"
+                if pattern is None or pattern in name:
+                    yield name, cls, method
+
+
+def measure(cls, method, n, repeat):
+    """Seconds (best of `repeat`) for time_ methods, peak bytes for peakmem_,
+    None if `setup` skips this size"""
+    bench = cls()
+    try:
+        bench.setup(n)
+    except NotImplementedError:
+        return None
+    fn = getattr(bench, method)
+    if method.startswith("time_"):
+        return min(timeit.repeat(lambda: fn(n), number=1, repeat=repeat))
+    tracemalloc.start()
+    try:
+        fn(n)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(max_scale, pattern=None, repeat=3):
+    """DataFrame of results, 1 row per benchmark and size"""
+    rows = []
+    for name, cls, method in discover(pattern):
+        for n in cls.params:
+            if n > max_scale:
+                continue
+            value = measure(cls, method, n, repeat)
+            if value is not None:
+                kind = "time_s" if method.startswith("time_") else "peak_bytes"
+                rows.append((name, n, kind, value))
+                print(f"{name} n={n:,} {kind}={value:.4g}", file=sys.stderr)
+    return pd.DataFrame(rows, columns=["benchmark", "n", "kind", "value"])
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def save(results, path):
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"environment": environment(), "results": results.to_dict("records")}
+    path.write_text(json.dumps(payload, indent=1))
+
+
+def load(path):
+    payload = json.loads(pathlib.Path(path).read_text())
+    return payload["environment"], pd.DataFrame(payload["results"])
+
+
+def compare(results, baseline, threshold=1.2):
+    """Join `baseline` onto `results`, ratio > `threshold` (or < 1 / `threshold`)
+    is flagged as slower/bigger (faster/smaller)"""
+    keys = ["benchmark", "n", "kind"]
+    baseline = baseline.rename(columns={"value": "value_base"})
+    report = results.merge(baseline, on=keys, how="left")  # NaN base if new
+    report["ratio"] = report["value"] / report["value_base"]
+    worse = np.where(report["kind"] == "time_s", "slower", "bigger")
+    better = np.where(report["kind"] == "time_s", "faster", "smaller")
+    report["change"] = np.select(
+        [report["ratio"] > threshold, report["ratio"] < 1 / threshold],
+        [worse, better],
+        default="",
+    )
+    return report.sort_values(keys).reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-scale", type=float, default=1e5)
+    parser.add_argument("--filter", default=None, help="substring of benchmark name")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", default=None, help="write results as a baseline")
+    parser.add_argument("--compare", default=None, help="baseline to compare with")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    results = run(args.max_scale, args.filter, args.repeat)
+    if args.save:
+        save(results, args.save)
+    if args.compare:
+        base_environment, baseline = load(args.compare)
+        if base_environment != environment():
+            print(f"Baseline environment differs: {base_environment}")
+        report = compare(results, baseline, args.threshold)
+    else:
+        report = results
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(report.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 """Text labelling helpers"""
 
+from collections import OrderedDict
 import math
+import numpy as np
+import pandas as pd
 
 
 def format_to_base_10(
@@ -42,6 +45,258 @@ def format_to_base_10(
     return output
 
 
+def _make_hashable(value):
+    """Turn lists (e.g. `suffixes`) and dicts into tuples so they can be a cache key"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_make_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _make_hashable(item)) for key, item in value.items()))
+    return value
+
+
+def _type_key(value):
+    """Types that tell equal values apart, pd.Interval(0, 1) == pd.Interval(0.0, 1.0)
+    but they are labelled '[0 - 1)' and '[0.0 - 1.0)'"""
+    left = getattr(value, "left", None)
+    return (type(value), type(left)) if left is not None else type(value)
+
+
+class MemoizedFormatter:
+    """Bounded LRU cache in front of a formatting function like `format_to_base_10`
+
+    Matplotlib re-runs tick formatters on every redraw and interval labels
+    repeat across many Series, so the same value and options get formatted
+    over and over. Results are keyed on the value, its type (1 == 1.0 but
+    they can format differently) and every formatting option, the least
+    recently used entry is evicted past `maxsize` and `cache_info()` reports
+    hits and misses. Unhashable values skip the cache.
+
+    fmt = MemoizedFormatter(format_to_base_10)
+    fmt(1000, precision=0)  # '1k' and cached
+    ax.yaxis.set_major_formatter(lambda x, pos: fmt(x, prefix="£"))"""
+
+    def __init__(self, format_fn, maxsize=4096):
+        self.format_fn = format_fn
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, value, **kwargs):
+        return self._lookup(value, _make_hashable(kwargs), kwargs)
+
+    def _lookup(self, value, hashable_kwargs, kwargs):
+        key = (value, _type_key(value), hashable_kwargs)
+        try:
+            label = self.cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable value, nothing to cache
+            self.misses += 1
+            return self.format_fn(value, **kwargs)
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return label
+        self.misses += 1
+        label = self.format_fn(value, **kwargs)
+        self.cache[key] = label
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return label
+
+    def bind(self, **kwargs):
+        """Fix the formatting options once, e.g. for `Series.map`, so the key
+        isn't rebuilt from kwargs on every call"""
+        hashable_kwargs = _make_hashable(kwargs)
+        return lambda value: self._lookup(value, hashable_kwargs, kwargs)
+
+    def cache_info(self):
+        """Hit/miss statistics and current size"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "maxsize": self.maxsize,
+            "currsize": len(self.cache),
+        }
+
+    def cache_clear(self):
+        """Empty the cache and reset the statistics"""
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+cached_format_to_base_10 = MemoizedFormatter(format_to_base_10)
+
+
+def _two_product(a, b):
+    """Dekker's error free product, a * b == product + error exactly"""
+    product = a * b
+    split = 2.0**27 + 1
+    a_high = a * split - (a * split - a)
+    a_low = a - a_high
+    b_high = b * split - (b * split - b)
+    b_low = b - b_high
+    error = (
+        (a_high * b_high - product) + a_high * b_low + a_low * b_high
+    ) + a_low * b_low
+    return product, error
+
+
+def _reshape_labels(arr, labels):
+    """Return `labels` as a Series if `arr` was a Series, otherwise as an array"""
+    if isinstance(arr, pd.Series):
+        return pd.Series(labels, index=arr.index, name=arr.name)
+    return labels
+
+
+def format_array_to_base_10(
+    arr,
+    precision=2,
+    suffixes=["", "k", "M", "G"],
+    prefix="",
+    postfix="",
+    trim_0_decimals=False,
+):
+    """Vectorised `format_to_base_10` for a whole array or Series
+
+    Gives identical strings to the scalar function. The exponent bucket,
+    scaling and rounding use array maths. Rows are grouped by their label
+    layout (sign, number of integer digits, decimals or not, suffix) so each
+    group's characters are written as code points in dense column operations,
+    then the fixed width buffer is viewed as a NumPy str array. NaN/inf and
+    values a hair under a power of 1000 (where np.log10 might not agree with
+    math.log10) are passed to `format_to_base_10` one at a time.
+    Returns a str array, or a Series with the same index if given a Series"""
+    format_kwargs = dict(
+        precision=precision,
+        suffixes=suffixes,
+        prefix=prefix,
+        postfix=postfix,
+        trim_0_decimals=trim_0_decimals,
+    )
+    nums = np.asarray(arr, dtype=np.float64)
+    if precision > 15:
+        # 10**precision isn't exact as a float, use the scalar path throughout
+        output = [format_to_base_10(num, **format_kwargs) for num in nums.ravel()]
+        return _reshape_labels(arr, np.array(output, dtype=str).reshape(nums.shape))
+    shape = nums.shape
+    nums = nums.ravel()
+    n = nums.shape[0]
+
+    is_negative = nums < 0
+    abs_nums = np.abs(nums)
+    fallback = ~np.isfinite(abs_nums)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # matches `int(math.log10(num) // 3)` with 0 (and NaN) treated as m==0
+        log_1000 = np.log10(abs_nums) / 3
+        m = np.floor(log_1000)
+        # np.log10 and math.log10 may differ by an ulp just below a power of 1000
+        nearest = np.rint(log_1000)
+        near = np.flatnonzero(np.abs(log_1000 - nearest) < 1e-12)
+        fallback[near] |= abs_nums[near] != 1000.0 ** nearest[near]
+    m = np.where((abs_nums == 0) | fallback, 0, m).astype(np.int64)
+    if (m >= len(suffixes)).any():
+        raise IndexError("list index out of range, too few suffixes for these values")
+    is_scaled = m >= 0
+    powers_of_1000 = 1000.0 ** np.arange(len(suffixes))
+    short_form = np.where(
+        is_scaled, abs_nums / powers_of_1000[np.maximum(m, 0)], abs_nums
+    )
+    # inf/NaN rows are formatted by the scalar path, zero them so the maths
+    # below doesn't warn on them
+    short_form[fallback] = 0
+
+    # round to `precision` decimals as an int like Python's formatting does, that
+    # rounds the exact binary value so a product landing on .5 needs its rounding
+    # error (from a Dekker two-product) to say which way to go
+    scaled, error = _two_product(short_form, 10.0**precision)
+    fallback |= scaled >= 2**52
+    scaled = np.where(fallback, 0, scaled)
+    rounded = np.rint(scaled)  # exact ties go to even, as Python does
+    on_tie = (scaled - np.floor(scaled) == 0.5) & (error != 0)
+    rounded = np.where(on_tie, np.floor(scaled) + (error > 0), rounded)
+    rounded = rounded.astype(np.int64)
+    int_part = rounded // 10**precision
+    decimals = rounded % 10**precision
+    has_decimals = np.full(n, precision > 0)
+    if precision > 0 and trim_0_decimals:
+        # `short_form == int(short_form)` so the unrounded value has no decimals
+        is_whole = is_scaled & (short_form == np.floor(short_form)) & ~fallback
+        int_part = np.where(is_whole, short_form, int_part).astype(np.int64)
+        has_decimals &= ~is_whole
+    nbr_int_digits = np.ones(n, dtype=np.int64)
+    for k in range(1, 19):
+        more_digits = int_part >= 10**k
+        if not more_digits.any():
+            break
+        nbr_int_digits += more_digits
+    # unscaled (m < 0) values get no suffix, use an extra "" entry for them
+    all_suffixes = list(suffixes) + [""]
+    suffix_idx = np.where(is_scaled, m, len(suffixes))
+
+    # sort rows so each label layout is a contiguous block of columns
+    layout = is_negative.astype(np.int16)
+    layout = layout * 20 + nbr_int_digits.astype(np.int16)
+    layout = layout * 2 + has_decimals
+    layout = layout * len(all_suffixes) + suffix_idx.astype(np.int16)
+    order = np.argsort(layout, kind="stable")
+    counts = np.bincount(layout, minlength=1)
+    ends = np.cumsum(counts)
+    int_part = int_part[order]
+    decimals = decimals[order]
+
+    width = (
+        1
+        + len(prefix)
+        + nbr_int_digits.max(initial=1)
+        + 1
+        + precision
+        + max(len(suffix) for suffix in all_suffixes)
+        + len(postfix)
+    )
+    code_points = np.zeros((width, n), dtype=np.uint32)
+    for group in np.flatnonzero(counts):
+        start, end = ends[group] - counts[group], ends[group]
+        first = order[start]
+        col = 0
+        for char in ("-" if is_negative[first] else "") + prefix:
+            code_points[col, start:end] = ord(char)
+            col += 1
+        for values, nbr_digits, separator in [
+            (int_part, nbr_int_digits[first], ""),
+            (decimals, precision if has_decimals[first] else 0, "."),
+        ]:
+            if nbr_digits == 0:
+                continue
+            if separator:
+                code_points[col, start:end] = ord(separator)
+                col += 1
+            values = values[start:end]
+            for k in range(nbr_digits):
+                digit = (values // 10 ** (nbr_digits - 1 - k)) % 10
+                code_points[col, start:end] = ord("0") + digit
+                col += 1
+        for char in all_suffixes[suffix_idx[first]] + postfix:
+            code_points[col, start:end] = ord(char)
+            col += 1
+    # back to 1 row per label in the original order
+    original_order = np.empty_like(order)
+    original_order[order] = np.arange(n)
+    code_points = np.take(np.ascontiguousarray(code_points.T), original_order, axis=0)
+    output = code_points.view(f"U{width}").ravel()
+
+    if fallback.any():
+        fallback_output = [
+            format_to_base_10(num, **format_kwargs) for num in nums[fallback].tolist()
+        ]
+        output = output.astype(f"U{max(width, *map(len, fallback_output))}")
+        output[fallback] = fallback_output
+    return _reshape_labels(arr, output.reshape(shape))
+
+
 if __name__ == "__main__":
     print(format_to_base_10(-2_500_000, prefix="£", precision=1))
     print(format_to_base_10(-2_000_000, prefix="£", precision=1))
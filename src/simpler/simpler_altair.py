@@ -1,3 +1,147 @@
+"""Altair charts for big data, aggregated in pandas and read from a file
+
+Altair inlines every row of `alt.Chart(df)` as JSON in the spec (and refuses
+beyond `alt.data_transformers` max_rows), so instead bin/aggregate in pandas
+with `bin_series` and `apply_labelling`, make the result JSON friendly with
+`to_plottable` and write it to a small file the spec refers to by URL.
+A histogram of 100M rows is then a few KB of spec plus a few KB of CSV.
+
+chart = histogram_chart(df["price"], make_bin_edges("0 100 ... 1000"),
+                        "price_hist.csv", format_fn=format_to_base_10, prefix="$")
+chart.save("price_hist.html")  # keep price_hist.csv next to it"""
+
+import pathlib
+import pandas as pd
+from simpler.simpler_pandas import Binner, bin_series, apply_labelling
+
+# file suffix -> Vega-Lite data format type
+DATA_FORMATS = {".csv": "csv", ".json": "json"}
+
+
+def to_plottable(df):
+    """Copy of `df` that Altair can serialise: a named or non-range index
+    becomes column(s) (no more `reset_index()` by hand), categoricals (e.g.
+    from `pd.cut`) get string categories, keeping their order, intervals
+    become strings and column names strings"""
+    if df.index.name is not None or not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index()
+    else:
+        df = df.copy()
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            # only the categories are converted, not every row
+            df[col] = df[col].cat.rename_categories(df[col].cat.categories.astype(str))
+        elif isinstance(dtype, pd.IntervalDtype):
+            df[col] = df[col].astype(str)
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def write_data(df, path, base_url=None):
+    """Write `df` (via `to_plottable`) as CSV or JSON records by `path`'s
+    suffix, return the URL a chart should load it from (`base_url` + file
+    name if given, e.g. where a web server will host it, else `path`)"""
+    path = pathlib.Path(path)
+    if path.suffix not in DATA_FORMATS:
+        raise ValueError(f"path must end in one of {list(DATA_FORMATS)}, not {path}")
+    df = to_plottable(df)
+    if path.suffix == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_json(path, orient="records")
+    if base_url is not None:
+        return base_url.rstrip("/") + "/" + path.name
+    return path.as_posix()
+
+
+def url_data(df, path, base_url=None):
+    """`alt.UrlData` for `df` written by `write_data`, use as `alt.Chart(url_data(...))`"""
+    import altair as alt
+
+    url = write_data(df, path, base_url)
+    data_format = alt.DataFormat(type=DATA_FORMATS[pathlib.Path(path).suffix])
+    return alt.UrlData(url=url, format=data_format)
+
+
+def histogram_data(ser, bin_edges, format_fn=None, **kwargs):
+    """Counts per bin (every bin, in order, empty ones too) as a DataFrame of
+    `bin` labels from `apply_labelling` and `count`. `bin_edges` are compiled
+    to a `Binner` so 100M rows bin with `np.searchsorted`, not `pd.cut`"""
+    if not isinstance(bin_edges, Binner):
+        bin_edges = Binner(bin_edges)
+    labelled = apply_labelling(bin_series(ser, bin_edges), format_fn, **kwargs)
+    counts = pd.Series(labelled).value_counts(sort=False)
+    return to_plottable(counts.rename_axis("bin").rename("count"))
+
+
+def aggregate_data(df, x, y=None, agg="count", color=None, bin_edges=None, **kwargs):
+    """`agg` of column `y` (rows if `y` is None) per `x` (and `color`) value,
+    binning `x` first with `bin_edges` and labelling with `apply_labelling`
+    (`kwargs` e.g. `format_fn`) if given, as a DataFrame ready to plot"""
+    keys = df[x]
+    if bin_edges is not None:
+        if not isinstance(bin_edges, Binner):
+            bin_edges = Binner(bin_edges)
+        labelled = apply_labelling(bin_series(keys, bin_edges), **kwargs)
+        keys = pd.Series(labelled, index=df.index, name=x)
+    by = [keys] if color is None else [keys, df[color]]
+    grouped = df.groupby(by, observed=bin_edges is None, sort=True)
+    if y is None:
+        aggregated = grouped.size().rename("count")
+    else:
+        aggregated = grouped[y].agg(agg)
+    return to_plottable(aggregated)
+
+
+def histogram_chart(
+    ser, bin_edges, path, format_fn=None, base_url=None, title=None, **kwargs
+):
+    """Bar chart of `histogram_data` with the counts written to `path`"""
+    import altair as alt
+
+    data = histogram_data(ser, bin_edges, format_fn, **kwargs)
+    # keep bin order rather than Altair's alphabetical sort of the labels
+    x = alt.X("bin:O", sort=data["bin"].tolist(), title=ser.name)
+    chart = alt.Chart(url_data(data, path, base_url)).mark_bar()
+    chart = chart.encode(x=x, y="count:Q", tooltip=["bin:O", "count:Q"])
+    return chart.properties(title=title) if title is not None else chart
+
+
+def aggregate_chart(
+    df,
+    x,
+    path,
+    y=None,
+    agg="count",
+    color=None,
+    bin_edges=None,
+    mark="bar",
+    base_url=None,
+    title=None,
+    **kwargs,
+):
+    """Chart (`mark` e.g. 'bar', 'line', 'point') of `aggregate_data` with the
+    aggregated rows, not the raw ones, written to `path`"""
+    import altair as alt
+
+    data = aggregate_data(df, x, y, agg, color, bin_edges, **kwargs)
+    value = "count" if y is None else str(y)
+    x_values = data[str(x)].drop_duplicates().tolist()
+    x_type = "O" if bin_edges is not None else "N"
+    encoding = {
+        "x": alt.X(f"{x}:{x_type}", sort=x_values),
+        "y": alt.Y(f"{value}:Q", title=value if y is None else f"{agg} of {y}"),
+        "tooltip": [str(x), value],
+    }
+    if color is not None:
+        encoding["color"] = alt.Color(f"{color}:N")
+        encoding["tooltip"].append(str(color))
+    chart = alt.Chart(url_data(data, path, base_url))
+    chart = getattr(chart, f"mark_{mark}")().encode(**encoding)
+    return chart.properties(title=title) if title is not None else chart
+
+
 # to try
 # columns='col' # will make multiple plots on that categorical
 # a | b # will make two plots side by side
@@ -1,6 +1,12 @@
+from concurrent.futures import ProcessPoolExecutor
 import math
+import os
+import time
 import matplotlib as mpl
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 
 # fig, ax = plt.subplots(constrained_layout=True, figsize=(4, 4))
 # fig, axs = plt.subplot_mosaic(['A', 'B'], ...) # name and describe the layout https://matplotlib.org/stable/api/_as_gen/matplotlib.pyplot.subplot_mosaic.html
@@ -69,26 +75,29 @@ def rotate_labels(x_axis=False, y_axis=False, rotation=-90):
         plt.yticks(rotation=rotation)
 
 
+def _format_commas(x, pos=None):
+    """1000000.0 -> '1,000,000' and 1234.5 -> '1,234.5', fractions are kept
+    (15 significant digits hide float noise like 0.30000000000000004)"""
+    if float(x).is_integer():
+        return f"{int(x):,}"
+    return f"{x:,.15g}"
+
+
 def set_commas(ax, x_axis=False, y_axis=False):
+    """Add commas e.g. 1_000_000 -> "1,000,000" to the tick labels
+
+    Uses a formatter on the tick values, so it doesn't depend on the
+    figure having been drawn (e.g. in `render_figures`) nor on parsing
+    tick text such as '−2000' (unicode minus) or '0.5'"""
     # NOTE this may not work well e.g. on bar plots
     # in which case make a df_to_plot where index has been
     # reset, turned with string formatting into good result,
     # then index has been set again
-    texts = []
+    formatter = mpl.ticker.FuncFormatter(_format_commas)
     if x_axis:
-        ticks = ax.get_xticks()
-        tick_labels = ax.get_xticklabels()
-        for label in tick_labels:
-            text = label.get_text()
-            texts.append(f"{int(text):,}")
-        plt.xticks(ticks=ticks, labels=texts)
+        ax.xaxis.set_major_formatter(formatter)
     if y_axis:
-        ticks = ax.get_yticks()
-        tick_labels = ax.get_yticklabels()
-        for label in tick_labels:
-            text = label.get_text()
-            texts.append(f"{int(text):,}")
-        plt.yticks(ticks=ticks, labels=texts)
+        ax.yaxis.set_major_formatter(formatter)
 
 
 def set_commas_olddependsonrendering(ax, on_x_axis=True, on_y_axis=True):
@@ -123,3 +132,178 @@ def set_human_format(ax, on_x_axis=False, on_y_axis=False, **kwargs):
             # OLD mpl.ticker.FuncFormatter(lambda x, p: f"{int(x):,}")
             mpl.ticker.FuncFormatter(lambda x, p: human_format(x, **kwargs))
         )
+
+
+def downsample_minmax(x, y, nbr_buckets, x_range=None):
+    """Positions of the points to keep so a line plot of `y` against the
+    sorted `x` looks the same when each of `nbr_buckets` (e.g. pixel
+    columns) over `x_range` (default all of `x`) only draws its first, min,
+    max and last point (the M4 method). Points outside `x_range` are dropped
+    except the nearest 1 either side, so a zoomed line still reaches the edges"""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    if x.shape[0] == 0:
+        return np.array([], dtype=np.intp)
+    lo, hi = (x[0], x[-1]) if x_range is None else x_range
+    first = max(int(np.searchsorted(x, lo, side="left")) - 1, 0)
+    last = min(int(np.searchsorted(x, hi, side="right")) + 1, x.shape[0])
+    if last - first <= 4 * nbr_buckets:
+        return np.arange(first, last)
+    edges = np.linspace(lo, hi, nbr_buckets + 1)
+    starts = np.searchsorted(x[first:last], edges[:-1], side="left")
+    starts[0] = 0  # the neighbour to the left joins the first bucket
+    starts = np.unique(starts)  # drop empty buckets, reduceat needs increasing starts
+    starts = starts[starts < last - first]
+    ends = np.append(starts[1:], last - first)
+    ys = y[first:last]
+    # NaNs are ignored unless a whole bucket is NaN, that bucket keeps first/last
+    mins = np.fmin.reduceat(ys, starts)
+    maxs = np.fmax.reduceat(ys, starts)
+    bucket = np.repeat(np.arange(starts.shape[0]), ends - starts)
+    keep = [starts, ends - 1]
+    for extreme in (mins, maxs):
+        matches = np.flatnonzero(ys == extreme[bucket])
+        # the first matching position in each bucket
+        _, first_match = np.unique(bucket[matches], return_index=True)
+        keep.append(matches[first_match])
+    return first + np.unique(np.concatenate(keep))
+
+
+class DownsampledLine:
+    """A line plot of a huge series that only hands matplotlib the points
+    visible at the axes' pixel width (`downsample_minmax`), redone whenever
+    the x limits change (zoom/pan or `ax.set_xlim`), so rendering and saving
+    cost depends on pixels not rows. `x` must be sorted (it is sorted if not),
+    datetime64 `x` is plotted as matplotlib dates
+
+    fig, ax = plt.subplots(constrained_layout=True, figsize=(8, 6))
+    line = DownsampledLine(ax, ser.index, ser, label="price")
+    set_common_mpl_styles(ax, ylabel="Price")
+    line.reduction_ratio  # e.g. 1250.0 for 5M rows over 1,000 pixels"""
+
+    def __init__(self, ax, x, y, pixels=None, **plot_kwargs):
+        x = np.asarray(x)
+        y = np.asarray(y, dtype=np.float64)
+        is_datetime = np.issubdtype(x.dtype, np.datetime64)
+        if is_datetime:
+            x = mdates.date2num(x)
+        if np.any(x[1:] < x[:-1]):
+            order = np.argsort(x, kind="stable")
+            x, y = x[order], y[order]
+        self.ax = ax
+        self.x = x
+        self.y = y
+        self.pixels = pixels
+        self.nbr_points = x.shape[0]
+        positions = self._positions(None)
+        (self.line,) = ax.plot(x[positions], y[positions], **plot_kwargs)
+        self.nbr_plotted = positions.shape[0]
+        if is_datetime:
+            ax.xaxis_date()
+        self._cid = ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
+
+    def _positions(self, x_range):
+        pixels = self.pixels
+        if pixels is None:
+            pixels = max(int(self.ax.get_window_extent().width), 1)
+        return downsample_minmax(self.x, self.y, pixels, x_range)
+
+    def _on_xlim_changed(self, ax):
+        positions = self._positions(sorted(ax.get_xlim()))
+        self.line.set_data(self.x[positions], self.y[positions])
+        self.nbr_plotted = positions.shape[0]
+
+    @property
+    def reduction_ratio(self):
+        """Rows in the series per point currently drawn"""
+        return self.nbr_points / max(self.nbr_plotted, 1)
+
+    def disconnect(self):
+        """Stop re-downsampling on x limit changes"""
+        self.ax.callbacks.disconnect(self._cid)
+
+    def __repr__(self):
+        return (
+            f"<DownsampledLine {self.nbr_plotted:,} of {self.nbr_points:,} points, "
+            f"{self.reduction_ratio:,.1f}x reduction>"
+        )
+
+
+# per worker process, (figsize, dpi) -> (fig, ax) reused across specs
+_worker_figures = {}
+
+
+def _init_render_worker():
+    mpl.use("Agg", force=True)
+
+
+def _render_spec(spec):
+    """Draw and save 1 plot spec (see `render_figures`) on this worker's
+    cached figure, returning its timings or the error it raised"""
+    start = time.perf_counter()
+    path = spec["path"]
+    try:
+        key = (tuple(spec.get("figsize", (8, 6))), spec.get("dpi", 100))
+        if key not in _worker_figures:
+            _worker_figures[key] = plt.subplots(
+                figsize=key[0], dpi=key[1], constrained_layout=True
+            )
+        fig, ax = _worker_figures[key]
+        ax.clear()
+        plt.figure(fig.number)
+        plt.sca(ax)  # rotate_labels and set_commas work on the current axes
+
+        kind = spec.get("kind", "plot")
+        args, kwargs = spec.get("args", ()), spec.get("kwargs", {})
+        if callable(kind):
+            kind(ax, *args, **kwargs)
+        else:
+            getattr(ax, kind)(*args, **kwargs)
+        set_common_mpl_styles(ax, **spec.get("styles", {}))
+        if "rotate_labels" in spec:
+            rotate_labels(**spec["rotate_labels"])
+        if "set_commas" in spec:
+            set_commas(ax, **spec["set_commas"])
+        drawn = time.perf_counter()
+        fig.savefig(path)
+        error = None
+    except Exception as ex:
+        drawn = time.perf_counter()
+        error = f"{type(ex).__name__}: {ex}"
+    end = time.perf_counter()
+    return (str(path), drawn - start, end - drawn, end - start, os.getpid(), error)
+
+
+def render_figures(specs, n_jobs=-1, chunksize=None):
+    """Render and save many figures across `n_jobs` processes (-1 for all
+    cores) using the Agg backend, each worker reuses 1 figure per
+    (figsize, dpi) rather than calling `plt.subplots` per figure
+
+    Each spec is a dict (picklable, so data as arrays/DataFrames, functions
+    defined at module level), only `path` (.png, .svg etc) is required:
+    kind: Axes method name (default 'plot') or a function `fn(ax, *args, **kwargs)`
+    args/kwargs: passed to it, e.g. args=(x, y), kwargs={"label": "sales"}
+    figsize/dpi: default (8, 6) and 100
+    styles: kwargs for `set_common_mpl_styles` (default legend=True etc)
+    rotate_labels/set_commas: kwargs for those, skipped if absent
+
+    specs = [{"path": f"{name}.png", "args": (df.index, df[name]),
+              "kwargs": {"label": name}, "styles": {"title": name}}
+             for name in df.columns]
+    timings = render_figures(specs)
+
+    Returns a DataFrame, 1 row per spec in order, with draw_seconds,
+    save_seconds, total_seconds, the worker pid and any error (a failing
+    spec doesn't stop the others)"""
+    specs = list(specs)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if chunksize is None:
+        # a few chunks per worker balances load without a round trip per spec
+        chunksize = max(len(specs) // (n_jobs * 4), 1)
+    with ProcessPoolExecutor(
+        max_workers=n_jobs, initializer=_init_render_worker
+    ) as executor:
+        rows = list(executor.map(_render_spec, specs, chunksize=chunksize))
+    columns = ["path", "draw_seconds", "save_seconds", "total_seconds", "pid"]
+    return pd.DataFrame(rows, columns=columns + ["error"])
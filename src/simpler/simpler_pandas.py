@@ -1,8 +1,11 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
+import os
 import pandas as pd
 import numpy as np
 from IPython.display import display
-from simpler.labelling import format_to_base_10
+from simpler.labelling import format_to_base_10, MemoizedFormatter
 
 # make_bin_edges will turn e.g. "1 2 ... 10" into [-inf, 1, 2, ..., 9, 10, inf]
 # bin_series will take the bin edges and a series and put them into bins
@@ -24,52 +27,686 @@ dayofweek_dict = {
 }
 
 
+class ConversionErrors:
+    """Report of values that failed a conversion (e.g. to NaT), keeping only
+    the first `trim_at` failing original values plus the total count"""
+
+    def __init__(self, nbr_rows, nbr_errors, samples, trim_at):
+        self.nbr_rows = nbr_rows
+        self.nbr_errors = nbr_errors
+        self.samples = samples  # Series of original values, original index
+        self.trim_at = trim_at
+
+    def __str__(self):
+        lines = [f"{self.nbr_errors} errors seen in conversion"]
+        if self.nbr_errors > self.trim_at:
+            lines.append(
+                f"{self.nbr_errors} is too many errors, trimming to {self.trim_at}"
+            )
+        for idx, value in self.samples.items():
+            lines.append(f"Row {idx} '{value}'")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"<ConversionErrors {self.nbr_errors} of {self.nbr_rows} rows>"
+
+
+def _to_datetime_chunk(chunk, format):
+    return pd.to_datetime(chunk, errors="coerce", format=format)
+
+
+def to_datetime_chunked(
+    ser, format="%b %Y", trim_at=10, chunk_size=1_000_000, n_jobs=1
+):
+    """`to_datetime` in `chunk_size` row chunks, in parallel over `n_jobs`
+    processes (-1 for all cores), returns the converted Series and a
+    `ConversionErrors` report of the first `trim_at` failures (NaT)
+    rather than printing. Peak working memory is per chunk"""
+    starts = range(0, ser.shape[0], chunk_size)
+    chunks = (ser.iloc[start : start + chunk_size] for start in starts)
+    convert = partial(_to_datetime_chunk, format=format)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs == 1:
+        converted = map(convert, chunks)
+        return _collect_datetime_chunks(ser, starts, converted, trim_at)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        converted = executor.map(convert, chunks)
+        return _collect_datetime_chunks(ser, starts, converted, trim_at)
+
+
+def _collect_datetime_chunks(ser, starts, converted, trim_at):
+    """Join converted chunks, counting NaTs and sampling the first failures"""
+    parts = []
+    nbr_errors = 0
+    samples = []
+    nbr_sampled = 0
+    for start, ser_nat in zip(starts, converted):
+        mask = ser_nat.isna().to_numpy()
+        nbr_in_chunk = int(mask.sum())
+        if nbr_in_chunk > 0 and nbr_sampled < trim_at:
+            failed = np.flatnonzero(mask)[: trim_at - nbr_sampled]
+            samples.append(ser.iloc[start + failed])
+            nbr_sampled += failed.shape[0]
+        nbr_errors += nbr_in_chunk
+        parts.append(ser_nat)
+    ser_nat = pd.concat(parts) if parts else pd.to_datetime(ser, errors="coerce")
+    samples = pd.concat(samples) if samples else ser.iloc[:0]
+    return ser_nat, ConversionErrors(ser.shape[0], nbr_errors, samples, trim_at)
+
+
 def to_datetime_helper(ser, format="%b %Y", trim_at=10):
     """Show conversion errors (as NaT) from original strings during `to_datetime` conversion
     A `format` of `%b %Y` corresponds to e.g. 'Jan 2023'
-    `to_datetime` seems to skip whitespace"""
-    ser_nat = pd.to_datetime(ser, errors="coerce", format=format)
-    # ser_nat can have NaT if error occurred
-    mask = ser_nat.isna()
-    print(f"{mask.sum()} errors seen in conversion")
-    # show the errors, trim if there are too many to show
-    mask_cum = mask.cumsum()
-    if mask.sum() > trim_at:
-        print(f"{mask.sum()} is too many errors, trimming to {trim_at}")
-    mask[mask_cum > trim_at] = False  # get the items up until the trim point
-    for idx, value in ser[mask].items():
-        print(f"Row {idx} '{value}'")
+    `to_datetime` seems to skip whitespace
+    See `to_datetime_chunked` for large columns and a report instead of printing"""
+    ser_nat, errors = to_datetime_chunked(ser, format=format, trim_at=trim_at)
+    print(errors)
     return ser_nat
 
 
-def check_series_is_ordered(ser, ascending=True):
-    """Check 1 series is ascending"""
-    #assert ascending == True, "Haven't done descending yet, nor tested this"
-    if not ascending:
-        ser = ser[::-1] # reverse the series order
-    return (
-        ser[1:].reset_index(drop=True) >= ser[:-1].reset_index(drop=True)
-    ).all()
+# parsed values from earlier calls, keyed on (kind, options) e.g. ("datetime", "%b %Y")
+# each is an LRU OrderedDict of original string -> parsed NumPy scalar
+_parse_caches = {}
+PARSE_CACHE_MAXSIZE = 100_000  # strings kept per (kind, options)
+_NOT_CACHED = object()
+
+
+def clear_parse_cache():
+    """Forget every value parsed by `to_datetime_cached` and `to_numeric_cached`"""
+    _parse_caches.clear()
+
+
+def _parse_unique(ser, parse_fn, cache_key, missing, cache_maxsize):
+    """Factorize `ser`, parse only the unique values (and only those not already
+    in the cache for `cache_key`, if given) and broadcast back through the codes
+    Cache lookups are per unique value of `ser`, not per cached value"""
+    codes, uniques = pd.factorize(ser)
+    uniques = pd.Index(uniques)
+    if cache_key is None:
+        parsed = parse_fn(pd.Series(uniques, dtype=object)).to_numpy()
+    else:
+        cache = _parse_caches.setdefault(cache_key, OrderedDict())
+        hit_positions, hit_values, miss_positions = [], [], []
+        for position, unique in enumerate(uniques):
+            value = cache.get(unique, _NOT_CACHED)
+            if value is _NOT_CACHED:
+                miss_positions.append(position)
+            else:
+                cache.move_to_end(unique)
+                hit_positions.append(position)
+                hit_values.append(value)
+        misses = uniques[miss_positions]
+        dtypes = [np.asarray(hit_values).dtype] if hit_values else []
+        if len(misses) > 0 or len(hit_values) == 0:
+            parsed_new = parse_fn(pd.Series(misses, dtype=object)).to_numpy()
+            dtypes.append(parsed_new.dtype)
+        else:
+            parsed_new = None
+        # e.g. cached floats with newly parsed ints must not truncate to int
+        parsed = np.empty(len(uniques), dtype=np.result_type(*dtypes))
+        if hit_values:
+            parsed[hit_positions] = hit_values
+        if parsed_new is not None:
+            parsed[miss_positions] = parsed_new
+            # only the last `cache_maxsize` would survive the evictions below
+            keep = slice(max(len(misses) - cache_maxsize, 0), None)
+            cache.update(zip(misses[keep], parsed_new[keep]))
+        while len(cache) > cache_maxsize:
+            cache.popitem(last=False)  # least recently used
+    # code -1 marks a missing value, index -1 picks this appended missing value
+    parsed = np.append(parsed, missing)
+    return pd.Series(parsed[codes], index=ser.index, name=ser.name)
+
+
+def to_datetime_cached(
+    ser, format="%b %Y", use_cache=False, cache_maxsize=PARSE_CACHE_MAXSIZE
+):
+    """`to_datetime` (errors become NaT) that only parses each unique string once
+    e.g. 'Jan 2023' repeated millions of times. With `use_cache` the last
+    `cache_maxsize` parsed strings are kept for later calls in this process,
+    see `clear_parse_cache`"""
+    parse_fn = partial(pd.to_datetime, errors="coerce", format=format)
+    cache_key = ("datetime", format) if use_cache else None
+    return _parse_unique(ser, parse_fn, cache_key, np.datetime64("NaT"), cache_maxsize)
+
+
+def _parse_numbers(ser, thousands, currency_symbols):
+    """Strip currency symbols, thousands separators and whitespace then convert"""
+    text = ser.astype(str)
+    for char in currency_symbols + thousands:
+        text = text.str.replace(char, "", regex=False)
+    return pd.to_numeric(text.str.strip(), errors="coerce")
+
+
+def to_numeric_cached(
+    ser,
+    thousands=",",
+    currency_symbols="$£€",
+    use_cache=False,
+    cache_maxsize=PARSE_CACHE_MAXSIZE,
+):
+    """`to_numeric` (errors become NaN) for strings like '£1,234.50' that only
+    parses each unique string once, with an optional cache as `to_datetime_cached`"""
+    parse_fn = partial(
+        _parse_numbers, thousands=thousands, currency_symbols=currency_symbols
+    )
+    cache_key = ("numeric", thousands, currency_symbols) if use_cache else None
+    return _parse_unique(ser, parse_fn, cache_key, np.nan, cache_maxsize)
+
+
+# (ascending, strict) -> comparison each element must pass against its predecessor
+_ORDER_COMPARISONS = {
+    (True, False): np.greater_equal,
+    (True, True): np.greater,
+    (False, False): np.less_equal,
+    (False, True): np.less,
+}
+
+
+def _order_values(ser):
+    """NumPy values that sort as `ser` does and the value marking a missing
+    entry (None when missing values already compare False, as NaN does)
+    Ordered categoricals compare by their codes (-1 missing) and datetimes,
+    including tz-aware ones, and timedeltas by int64 views (NaT the minimum)"""
+    array = getattr(ser, "array", ser)
+    dtype = getattr(array, "dtype", None)
+    if isinstance(dtype, pd.CategoricalDtype) and dtype.ordered:
+        return np.asarray(array.codes), -1
+    if getattr(dtype, "kind", None) in ("M", "m"):
+        return np.asarray(array.view("i8")), np.iinfo(np.int64).min
+    return np.asarray(ser), None
+
+
+def _pairs_in_order(compare, after, before, missing):
+    """`compare` each element of `after` with its predecessor in `before`,
+    pairs with a `missing` value are out of order"""
+    in_order = compare(after, before)
+    if missing is not None:
+        in_order &= (after != missing) & (before != missing)
+    return in_order
+
+
+def find_first_unordered(ser, ascending=True, strict=False, block_size=1_000_000):
+    """Position of the first element out of order (vs the one before it), or None
+    Works on the underlying NumPy buffer without index copies, comparing
+    `block_size` pairs at a time and stopping at the first block with a
+    violation. `strict` disallows equal neighbours. NaN/NaT count as out of order
+    Ordered categoricals follow their categories' order"""
+    values, missing = _order_values(ser)
+    compare = _ORDER_COMPARISONS[(ascending, strict)]
+    for start in range(0, values.shape[0] - 1, block_size):
+        end = min(start + block_size, values.shape[0] - 1)
+        in_order = _pairs_in_order(
+            compare, values[start + 1 : end + 1], values[start:end], missing
+        )
+        if not in_order.all():
+            return start + 1 + int(np.argmin(in_order))
+    return None
+
+
+def find_first_unordered_in_chunks(
+    chunks, ascending=True, strict=False, column=None, block_size=1_000_000
+):
+    """`find_first_unordered` across a sequence of chunks (e.g. from a streaming
+    reader, taking `column` from each if given) including the boundaries
+    between chunks, returns the overall position or None"""
+    compare = _ORDER_COMPARISONS[(ascending, strict)]
+    offset = 0
+    previous_last = None
+    for chunk in chunks:
+        if column is not None:
+            chunk = chunk[column]
+        values, missing = _order_values(chunk)
+        if values.shape[0] == 0:
+            continue
+        if (
+            previous_last is not None
+            and not _pairs_in_order(compare, values[:1], previous_last, missing).all()
+        ):
+            return offset
+        position = find_first_unordered(chunk, ascending, strict, block_size)
+        if position is not None:
+            return offset + position
+        previous_last = values[-1:]
+        offset += values.shape[0]
+    return None
+
+
+def check_series_is_ordered(ser, ascending=True, strict=False):
+    """Check 1 series is ascending (or descending), see `find_first_unordered`"""
+    return find_first_unordered(ser, ascending=ascending, strict=strict) is None
+
+
+def _root_buffer(arr):
+    """The array that owns the memory behind `arr`"""
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+
+def _sample(x, sample_size):
+    """Up to `sample_size` rows of a Series or DataFrame, reproducibly
+    Positions come from a `Generator`, which only tracks the `sample_size`
+    chosen, unlike `x.sample` which permutes every row"""
+    n = x.shape[0]
+    if n <= sample_size:
+        return x
+    positions = np.random.default_rng(0).choice(n, sample_size, replace=False)
+    positions.sort()  # read the rows in memory order
+    return x.take(positions)
+
+
+def _suggest_dtype(ser, sample, category_threshold=0.5):
+    """A smaller dtype for `ser` and its estimated size in bytes, or (None, None)
+    Integer ranges use the whole column (a cheap min/max), float32 and
+    category suggestions (unique ratio below `category_threshold`) are judged
+    on `sample` so should be checked before use, or pass `ser` as the sample"""
+    n = ser.shape[0]
+    if n == 0:
+        return None, None
+    dtype = ser.dtype
+    if pd.api.types.is_bool_dtype(dtype) or not isinstance(dtype, np.dtype):
+        # pandas extension dtypes (category, string, nullable ints...) are left alone
+        return None, None
+    if pd.api.types.is_integer_dtype(dtype):
+        low, high = ser.min(), ser.max()
+        # signed only (as `pd.to_numeric(downcast="integer")`), unsigned would
+        # wrap around on subtraction e.g. uint8 1 - 3 == 254
+        for candidate in ["int8", "int16", "int32"]:
+            info = np.iinfo(candidate)
+            smaller = np.dtype(candidate).itemsize < dtype.itemsize
+            if smaller and info.min <= low and high <= info.max:
+                return candidate, n * np.dtype(candidate).itemsize
+    elif dtype == np.float64:
+        values = sample.to_numpy()
+        # only if the sample round-trips exactly (NaN compares unequal so check it apart)
+        round_trips = values.astype(np.float32).astype(np.float64) == values
+        if (round_trips | np.isnan(values)).all():
+            return "float32", n * 4
+    elif dtype == object:
+        nbr_unique = sample.nunique(dropna=False)
+        if nbr_unique < category_threshold * sample.shape[0]:
+            # scale the sample's unique count up to guess how many codes we need
+            nbr_categories = max(nbr_unique * n // sample.shape[0], 1)
+            code_size = np.min_scalar_type(-nbr_categories).itemsize
+            categories = sample.drop_duplicates().memory_usage(deep=True, index=False)
+            return "category", n * code_size + categories
+    return None, None
+
+
+def memory_report(df, sample_size=100_000):
+    """Memory layout of a DataFrame from public APIs, 1 row per column
+
+    dtype, memory_bytes (deep, estimated from a `sample_size` row sample for
+    larger object columns, flagged by memory_estimated), block (columns
+    sharing 1 NumPy buffer have the same number, pandas consolidates
+    same-dtype columns into 1 block), is_view (the buffer is bigger than
+    this frame uses e.g. after slicing, so it holds on to more memory) and
+    a suggested_dtype with its estimated saving_bytes"""
+    rows = []
+    roots = []
+    for col in df.columns:
+        ser = df[col]
+        # only object sizes and float32 round-trips are judged on a sample
+        needs_sample = ser.dtype == object or ser.dtype == np.float64
+        sample = _sample(ser, sample_size) if needs_sample else ser
+        memory_estimated = ser.dtype == object and sample.shape[0] < ser.shape[0]
+        if memory_estimated:
+            memory_bytes = int(
+                sample.memory_usage(deep=True, index=False)
+                * ser.shape[0]
+                / sample.shape[0]
+            )
+        else:
+            memory_bytes = int(ser.memory_usage(deep=True, index=False))
+        block, is_view = None, False
+        if isinstance(ser.dtype, np.dtype):
+            root = _root_buffer(ser.to_numpy())
+            for block, known_root in enumerate(roots):
+                if known_root is root:
+                    break
+            else:
+                roots.append(root)
+                block = len(roots) - 1
+        suggested_dtype, suggested_bytes = _suggest_dtype(ser, sample)
+        saving_bytes = 0 if suggested_bytes is None else memory_bytes - suggested_bytes
+        rows.append(
+            (
+                col,
+                str(ser.dtype),
+                memory_bytes,
+                memory_estimated,
+                block,
+                is_view,
+                suggested_dtype,
+                max(saving_bytes, 0),
+            )
+        )
+    report = pd.DataFrame(
+        rows,
+        columns=[
+            "column",
+            "dtype",
+            "memory_bytes",
+            "memory_estimated",
+            "block",
+            "is_view",
+            "suggested_dtype",
+            "saving_bytes",
+        ],
+    ).set_index("column")
+    # a buffer holding more elements than this frame's columns use is a view
+    # onto something bigger
+    for block, root in enumerate(roots):
+        in_block = report["block"] == block
+        report.loc[in_block, "is_view"] = root.size > in_block.sum() * df.shape[0]
+    report["block"] = report["block"].astype("Int64")
+    return report
+
+
+def optimize_dtypes(df, category_threshold=0.5, arrow_strings=True):
+    """Shrink a DataFrame by converting columns to smaller dtypes
+    Integers are downcast to the narrowest signed type holding their min/max,
+    floats to float32 only if every value survives exactly, object columns with
+    a unique ratio below `category_threshold` become categorical and other all
+    string columns become Arrow-backed strings (if `arrow_strings` and
+    pyarrow is installed). Checks use the whole column (see `memory_report`
+    for a sampled estimate). Returns the new frame and a before/after table"""
+    try:
+        import pyarrow  # noqa: F401
+
+        arrow_strings_available = arrow_strings
+    except ImportError:
+        arrow_strings_available = False
+
+    new_columns = []
+    rows = []
+    for col in df.columns:
+        ser = df[col]
+        new_dtype, _ = _suggest_dtype(ser, ser, category_threshold)
+        if (
+            new_dtype is None
+            and arrow_strings_available
+            and ser.dtype == object
+            and pd.api.types.infer_dtype(ser, skipna=True) == "string"
+        ):
+            new_dtype = "string[pyarrow]"
+        new_ser = ser if new_dtype is None else ser.astype(new_dtype)
+        new_columns.append(new_ser)
+        bytes_before = int(ser.memory_usage(deep=True, index=False))
+        bytes_after = int(new_ser.memory_usage(deep=True, index=False))
+        rows.append(
+            (col, str(ser.dtype), str(new_ser.dtype), bytes_before, bytes_after)
+        )
+
+    new_df = pd.concat(new_columns, axis=1) if new_columns else df.copy()
+    new_df.columns = df.columns
+    table = pd.DataFrame(
+        rows,
+        columns=[
+            "column",
+            "dtype_before",
+            "dtype_after",
+            "bytes_before",
+            "bytes_after",
+        ],
+    ).set_index("column")
+    table["saving_bytes"] = table["bytes_before"] - table["bytes_after"]
+    return new_df, table
 
 
 def show_df_details(df):
-    """Dig into _data hidden attribute, note is_consolidated check can be slow first time"""
-    import warnings
+    """Show the memory layout using public APIs via `memory_report`
+    (this used to dig into the deprecated DataFrame._data hidden attribute)"""
+    report = memory_report(df)
+    blocks = report["block"].dropna()
+    nbr_blocks = blocks.nunique() + report["block"].isna().sum()
+    numpy_dtypes = report.loc[report["block"].notna(), "dtype"].nunique()
+    is_consolidated = blocks.nunique() == numpy_dtypes
+    is_view = report["is_view"].any()
+    print(
+        f"is view {is_view}, is consolidated {is_consolidated}, single block {nbr_blocks == 1}"
+    )
+    print(f"{nbr_blocks} blocks looking like:")
+    print(report.to_string())
 
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        # 2023 we get DeprecationWarning: DataFrame._data is deprecated and will be removed in a future version. Use public APIs instead.
-        print(
-            f"""is view {df._data.is_view}, is consolidated {df._data.is_consolidated()}, single block {df._data.is_single_block}"""
+
+class _QuantileSketch:
+    """Mergeable approximate quantiles (a simple KLL style compactor stack)
+
+    Level `i` holds items each standing for 2**i original values, a level
+    over `k` items is sorted and every other item (random offset) promoted
+    up a level. Memory is about `k` items per level, log2(n / k) levels"""
+
+    def __init__(self, k=4096, seed=0):
+        self.k = k
+        self.levels = []
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Add a 1D float array without NaNs"""
+        self._add(0, values)
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            self._add(level, items)
+        return self
+
+    def _add(self, level, items):
+        while items.shape[0] > 0:
+            if level == len(self.levels):
+                self.levels.append(items[:0])
+            items = np.concatenate([self.levels[level], items])
+            if items.shape[0] <= self.k:
+                self.levels[level] = items
+                return
+            items = np.sort(items)
+            nbr_paired = items.shape[0] - items.shape[0] % 2
+            self.levels[level] = items[nbr_paired:]  # odd one out stays here
+            items = items[self.rng.integers(2) : nbr_paired : 2]
+            level += 1
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(lvl.shape[0], 2**level) for level, lvl in enumerate(self.levels)]
         )
-        print(f"""{df._data.nblocks} blocks looking like:""")
-        print(df._data.blocks)
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1])
+        return items[order][np.minimum(positions, items.shape[0] - 1)]
+
+
+class _ColumnSummary:
+    """Running count/nulls/mean/M2/min/max for 1 column plus its values for
+    exact percentiles, swapped for a `_QuantileSketch` once values from more
+    than 1 chunk pass `approx_threshold`"""
+
+    def __init__(self, dtype, approx_threshold, sketch_size):
+        self.dtype = dtype
+        self.approx_threshold = approx_threshold
+        self.sketch_size = sketch_size
+        self.memory_bytes = 0
+        self.count = 0
+        self.nulls = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.min = np.nan
+        self.max = np.nan
+        self.values = []
+        self.sketch = None
+
+    def update(self, ser):
+        values = ser.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        self.memory_bytes += int(ser.memory_usage(deep=True, index=False))
+        self.nulls += ser.shape[0] - values.shape[0]
+        if values.shape[0] == 0:
+            return
+        other = _ColumnSummary(self.dtype, self.approx_threshold, self.sketch_size)
+        other.count = values.shape[0]
+        other.mean = values.mean()
+        other.m2 = np.square(values - other.mean).sum()
+        other.min, other.max = values.min(), values.max()
+        other.values = [values]
+        self._merge_moments(other)
+
+    def merge(self, other):
+        self.memory_bytes += other.memory_bytes
+        self.nulls += other.nulls
+        if other.count > 0:
+            self._merge_moments(other)
+
+    def _merge_moments(self, other):
+        # Chan et al.'s pairwise update, stable for large counts
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        if other.sketch is not None:
+            self._to_sketch().merge(other.sketch)
+        for values in other.values:
+            if self.sketch is not None:
+                self.sketch.update(values)
+            else:
+                self.values.append(values)
+        # 1 chunk's values are already in memory and 1 partition beats
+        # sketching them, only accumulating chunks need bounding
+        accumulating = len(self.values) > 1
+        if self.sketch is None and accumulating and self.count > self.approx_threshold:
+            self._to_sketch()
+
+    def _to_sketch(self):
+        if self.sketch is None:
+            self.sketch = _QuantileSketch(self.sketch_size)
+            for values in self.values:
+                self.sketch.update(values)
+            self.values = []
+        return self.sketch
+
+    def percentiles(self, percentiles):
+        """Linear interpolation as `Series.quantile`, from 1 partition of the values"""
+        if self.count == 0:
+            return np.full(len(percentiles), np.nan)
+        if self.sketch is not None:
+            return self.sketch.quantiles(percentiles)
+        values = np.concatenate(self.values)
+        self.values = [values]
+        positions = np.asarray(percentiles) * (self.count - 1)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.ceil(positions).astype(np.int64)
+        values.partition(np.unique(np.concatenate([lower, upper])))
+        return values[lower] + (values[upper] - values[lower]) * (positions - lower)
+
+
+class SummaryStats:
+    """A better `describe` for numeric columns, 1 row per column with dtype,
+    memory_bytes, count, nulls, mean, std, min, the `percentiles` (5% and
+    95% by default) and max. Other columns are listed in `ignored_columns`
+
+    Each column is summarised in 1 pass with percentiles from 1
+    `np.partition` of its values rather than a call per quantile. Columns
+    whose values from several chunks add up to more than `approx_threshold`
+    switch to an approximate quantile sketch of about `sketch_size` values
+    per level (min/max stay exact), 1 chunk is always exact. Summaries of
+    chunks (e.g. `pd.read_csv(..., chunksize=...)`) or from other processes
+    can be merged, see `describe_fast` for 1 frame
+
+    stats = SummaryStats().update_from(pd.read_csv("big.csv", chunksize=1_000_000))
+    stats.result()"""
+
+    def __init__(
+        self,
+        percentiles=(0.05, 0.25, 0.5, 0.75, 0.95),
+        approx_threshold=1_000_000,
+        sketch_size=4096,
+    ):
+        self.percentiles = list(percentiles)
+        self.approx_threshold = approx_threshold
+        self.sketch_size = sketch_size
+        self.columns = {}
+        self.ignored_columns = []
+
+    def _column(self, col, dtype):
+        if col not in self.columns:
+            self.columns[col] = _ColumnSummary(
+                dtype, self.approx_threshold, self.sketch_size
+            )
+        return self.columns[col]
+
+    def update(self, df):
+        """Add the rows of 1 DataFrame (chunk)"""
+        for col in df.columns:
+            ser = df[col]
+            is_numeric = pd.api.types.is_numeric_dtype(ser.dtype)
+            if not is_numeric or pd.api.types.is_bool_dtype(ser.dtype):
+                if col not in self.ignored_columns:
+                    self.ignored_columns.append(col)
+                continue
+            self._column(col, ser.dtype).update(ser)
+        return self
+
+    def update_from(self, chunks):
+        """Consume an iterator of DataFrame chunks"""
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def merge(self, other):
+        """Add a summary built elsewhere with the same percentiles"""
+        if other.percentiles != self.percentiles:
+            raise ValueError("Can only merge summaries with the same percentiles")
+        for col, summary in other.columns.items():
+            self._column(col, summary.dtype).merge(summary)
+        for col in other.ignored_columns:
+            if col not in self.ignored_columns:
+                self.ignored_columns.append(col)
+        return self
+
+    def result(self):
+        """DataFrame of the summary, 1 row per numeric column"""
+        labels = [f"{pct * 100:g}%" for pct in self.percentiles]
+        rows = []
+        for summary in self.columns.values():
+            std = (
+                np.sqrt(summary.m2 / (summary.count - 1))
+                if summary.count > 1
+                else np.nan
+            )
+            mean = summary.mean if summary.count > 0 else np.nan
+            rows.append(
+                [str(summary.dtype), summary.memory_bytes, summary.count, summary.nulls]
+                + [mean, std, summary.min]
+                + list(summary.percentiles(self.percentiles))
+                + [summary.max, summary.sketch is not None]
+            )
+        columns = ["dtype", "memory_bytes", "count", "nulls", "mean", "std", "min"]
+        columns += labels + ["max", "approximate"]
+        result = pd.DataFrame(rows, index=list(self.columns), columns=columns)
+        result.attrs["ignored_columns"] = list(self.ignored_columns)
+        return result
+
+
+def describe_fast(
+    df, percentiles=(0.05, 0.25, 0.5, 0.75, 0.95), approx_threshold=1_000_000
+):
+    """`SummaryStats` of 1 DataFrame, a transposed `describe` with 5/95%
+    percentiles, nulls, dtype and memory. Non-numeric column names are in
+    `result.attrs["ignored_columns"]`. Percentiles are exact, as the frame
+    is already in memory, `approx_threshold` only applies to chunks"""
+    stats = SummaryStats(percentiles, approx_threshold=approx_threshold)
+    return stats.update(df).result()
 
 
 def sanity_check(df):
     """Raise warnings if weirdness found"""
     # TODO could consider using unidecode to check for weirdness
-    # TODO for object cols apply same sanity checks
+    # see sanity_scan for the same checks over object column values
     # check for strange things in columns
     for n, item in enumerate(df.columns):
         weird = False
@@ -83,6 +720,89 @@ def sanity_check(df):
             raise Warning(f'Weirdness for column {n} with value "{item}"')
 
 
+def _string_issues(uniques, counts):
+    """Flag issues for each unique value of a column, 1 bool array per issue
+    `counts` (rows per unique value) weights the majority type by rows"""
+    uniques = pd.Series(uniques, dtype=object)
+    is_str = uniques.map(type) == str
+    text = uniques.where(is_str, "").astype(str)
+    issues = {
+        "leading/trailing whitespace": (text != text.str.strip()).to_numpy(),
+        "non-breaking space": text.str.contains("\xa0", regex=False).to_numpy(),
+        # e.g. Cyrillic lookalikes, smart quotes or zero-width spaces
+        "non-ascii": text.str.contains(r"[^\x00-\x7f\xa0]", regex=True).to_numpy(),
+    }
+    types = uniques.map(type)
+    rows_per_type = pd.Series(counts).groupby(types[uniques.notna()], sort=False).sum()
+    if rows_per_type.shape[0] > 1:
+        # values that aren't the type of most rows
+        minority = types != rows_per_type.idxmax()
+        issues["mixed types"] = (minority & uniques.notna()).to_numpy()
+    return issues
+
+
+def _report_string_issues(col, codes, counts, issues, index, sample_size):
+    """Report rows (count and first `sample_size` index labels) per flagged issue"""
+    report = []
+    for issue, flagged in issues.items():
+        count = int(counts[flagged].sum())
+        if count == 0:
+            continue
+        flagged_rows = np.flatnonzero(np.isin(codes, np.flatnonzero(flagged)))
+        sample_rows = index[flagged_rows[:sample_size]].tolist()
+        report.append((col, issue, count, sample_rows))
+    return report
+
+
+def sanity_scan(df, sample_size=5, n_jobs=1):
+    """Report weirdness in column names and the values of object/string columns
+    Returns a DataFrame of column, issue, count and sample_rows (index labels)
+    rather than raising on the first problem like `sanity_check`.
+    Columns are factorized 1 at a time so only unique values get the
+    vectorised `.str` checks, those can run over `n_jobs` processes (-1 for
+    all cores) which only receive the uniques. A column's codes are kept
+    just until its report is done, so at most `n_jobs` columns at once"""
+    report = []
+    for item in df.columns:
+        if not isinstance(item, str):
+            continue
+        if item != item.strip():
+            report.append((item, "column name whitespace", 1, []))
+        if "\xa0" in item:
+            report.append((item, "column name non-breaking space", 1, []))
+
+    text_columns = [
+        col
+        for col, dtype in df.dtypes.items()
+        if dtype == object or isinstance(dtype, pd.StringDtype)
+    ]
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs == 1:
+        for col in text_columns:
+            codes, uniques = pd.factorize(df[col])
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            issues = _string_issues(uniques, counts)
+            report += _report_string_issues(
+                col, codes, counts, issues, df.index, sample_size
+            )
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            pending = []  # (col, codes, counts, future) oldest first
+            for position, col in enumerate(text_columns):
+                codes, uniques = pd.factorize(df[col])
+                counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+                future = executor.submit(_string_issues, uniques, counts)
+                pending.append((col, codes, counts, future))
+                is_last = position == len(text_columns) - 1
+                while pending and (len(pending) >= n_jobs or is_last):
+                    col_done, codes, counts, future = pending.pop(0)
+                    report += _report_string_issues(
+                        col_done, codes, counts, future.result(), df.index, sample_size
+                    )
+    return pd.DataFrame(report, columns=["column", "issue", "count", "sample_rows"])
+
+
 def show_all(x, head=999, tail=10):
     """List more rows of DataFrame and Series results than usual"""
     # CONSIDER using 'display.max_columns' too?
@@ -101,30 +821,169 @@ def show_all(x, head=999, tail=10):
             display(x.tail(tail))
 
 
+class PagedView:
+    """Page through a big DataFrame or Series with `show_all`, a window at a time
+
+    Only the requested rows (by `page` of `page_size`, or a `start`/`stop` row
+    range) and columns (by `column_page` of `column_page_size`) are sliced
+    with `iloc` and rendered, nothing else is computed per page. Frames
+    longer than `large` rows get summary stats from a `sample_size` row
+    sample, computed once here and shown with `show_summary`"""
+
+    def __init__(
+        self, x, page_size=50, column_page_size=20, large=100_000, sample_size=10_000
+    ):
+        self.x = x
+        self.page_size = page_size
+        self.column_page_size = column_page_size
+        self.nbr_rows = x.shape[0]
+        self.nbr_columns = x.shape[1] if x.ndim == 2 else 1
+        self.nbr_pages = max(1, -(-self.nbr_rows // page_size))
+        self.nbr_column_pages = max(1, -(-self.nbr_columns // column_page_size))
+        self.page = 0
+        self.summary = None
+        if self.nbr_rows > large:
+            sample = _sample(x, sample_size)
+            self.summary = sample.describe(include="all")
+            self.summary_sample_size = sample.shape[0]
+
+    def window(self, page=0, column_page=0, start=None, stop=None):
+        """The slice of `x` for a page (negative counts from the end) or a row range"""
+        if start is None and stop is None:
+            if page < 0:
+                page += self.nbr_pages
+            if not 0 <= page < self.nbr_pages:
+                raise IndexError(f"page {page} not in 0..{self.nbr_pages - 1}")
+            start = page * self.page_size
+            stop = start + self.page_size
+        rows = slice(start, stop)
+        if self.x.ndim == 1:
+            return self.x.iloc[rows]
+        if not 0 <= column_page < self.nbr_column_pages:
+            raise IndexError(
+                f"column page {column_page} not in 0..{self.nbr_column_pages - 1}"
+            )
+        col_start = column_page * self.column_page_size
+        columns = slice(col_start, col_start + self.column_page_size)
+        return self.x.iloc[rows, columns]
+
+    def show(self, page=0, column_page=0, start=None, stop=None):
+        """Render one window, remembering the page for `next`/`prev`"""
+        win = self.window(page, column_page, start, stop)
+        position = ""
+        if start is None and stop is None:
+            self.page = page % self.nbr_pages
+            position = f"page {self.page + 1} of {self.nbr_pages}, "
+            start = self.page * self.page_size
+            stop = start + self.page_size
+        row_from, row_to, _ = slice(start, stop).indices(self.nbr_rows)
+        print(f"{position}rows {row_from}-{row_to} of {self.nbr_rows}", end="")
+        if self.x.ndim == 2:
+            col_from = column_page * self.column_page_size
+            col_to = col_from + win.shape[1]
+            print(f", columns {col_from}-{col_to} of {self.nbr_columns}", end="")
+        print()
+        show_all(win, head=win.shape[0], tail=0)
+
+    def next(self, column_page=0):
+        """Render the page after the last one shown, stopping at the end"""
+        self.show(min(self.page + 1, self.nbr_pages - 1), column_page)
+
+    def prev(self, column_page=0):
+        """Render the page before the last one shown, stopping at the start"""
+        self.show(max(self.page - 1, 0), column_page)
+
+    def show_summary(self):
+        """Render the sampled summary stats, if `x` was large enough to have any"""
+        if self.summary is None:
+            print(f"{self.nbr_rows} rows is small, use x.describe() directly")
+            return
+        print(
+            f"Summary from a sample of {self.summary_sample_size} "
+            f"of {self.nbr_rows} rows (approximate)"
+        )
+        show_all(self.summary, head=self.summary.shape[0], tail=0)
+
+
+def _approximate_value_counts(ser, k, chunk_size):
+    """Misra-Gries heavy hitters with `k` counters, fed 1 exact chunk count at a time
+    Returns the (under)estimated counts and the most any count can be short by,
+    which is at most len(ser) / (k + 1)"""
+    counters = pd.Series(dtype=np.int64)
+    error = 0
+    for start in range(0, ser.shape[0], chunk_size):
+        chunk_counts = ser.iloc[start : start + chunk_size].value_counts(dropna=False)
+        counters = pd.concat([counters, chunk_counts])
+        counters = counters.groupby(level=0, dropna=False, sort=False).sum()
+        if counters.shape[0] > k:
+            # decrement every counter by the (k+1)th largest, drop those reaching 0
+            kth_plus_1 = counters.nlargest(k + 1).iloc[-1]
+            error += kth_plus_1
+            counters = counters[counters > kth_plus_1] - kth_plus_1
+    return counters.sort_values(ascending=False), error
+
+
 # TODO
 # check value_counts in a Notebook with use_display=True
-def value_counts_pct(ser, rows=10, use_display=False):
-    """Prettier value counts, returns dataframe of counts & percents"""
-    vc1 = ser.value_counts(dropna=False)
-    vc2 = ser.value_counts(dropna=False, normalize=True)
-    df = pd.DataFrame({"count": vc1, "pct": vc2 * 100})
+def value_counts_pct(
+    ser, rows=10, use_display=False, approx_top_k=None, chunk_size=1_000_000
+):
+    """Prettier value counts, returns dataframe of counts & percents
+    Only the first `rows` are rendered. For columns too large to hash exactly
+    set `approx_top_k` to track at most that many values (Misra-Gries on
+    `chunk_size` row chunks), `count` is then a lower bound and `count_max`
+    an upper bound, the error is at most len(ser) / (approx_top_k + 1)"""
+    if approx_top_k is None:
+        vc = ser.value_counts(dropna=False)
+        df = pd.DataFrame({"count": vc})
+    else:
+        vc, error = _approximate_value_counts(ser, approx_top_k, chunk_size)
+        df = pd.DataFrame({"count": vc, "count_max": vc + error})
+    df["pct"] = df["count"] / ser.shape[0] * 100
     df["pct_cum"] = df.pct.cumsum()
     if use_display:
         # use style as that's CSS/HTML only for a Notebook
-        display(df[:rows].style.format({"pct": "{:0.1f}%"}))
+        display(df.iloc[:rows].style.format({"pct": "{:0.1f}%"}))
     else:
         formatters = {"pct": "{:0.1f}%".format, "pct_cum": "{:0.1f}%".format}
-        print(df.to_string(formatters=formatters))
+        print(df.iloc[:rows].to_string(formatters=formatters))
     rows_not_shown = max(df.shape[0] - rows, 0)
     print(f"Total rows not shown {rows_not_shown} of {df.shape[0]}")
+    if approx_top_k is not None:
+        print(f"Approximate counts, each is short by at most {error:,}")
     return df
 
 
-# TODO add test
+def _flatten_labels(index, sep):
+    """Join each MultiIndex entry's values with `sep`, each level's unique values
+    are turned into strings once and combined by their codes"""
+    if not isinstance(index, pd.MultiIndex):
+        return [sep.join(str(s) for s in multi_index) for multi_index in index.values]
+    labels = None
+    for level, codes in zip(index.levels, index.codes):
+        # a code of -1 (missing) picks the NA label appended at the end, "NaT"
+        # for datetime-like levels as `str(pd.NaT)`, object (not fixed width
+        # str) arrays keep any trailing NUL characters
+        datetime_like = (pd.DatetimeIndex, pd.TimedeltaIndex, pd.PeriodIndex)
+        na_label = "NaT" if isinstance(level, datetime_like) else "nan"
+        level_labels = np.array(
+            [str(value) for value in level] + [na_label], dtype=object
+        )
+        parts = level_labels[codes]
+        if labels is None:
+            labels = parts
+        else:
+            labels = labels + sep + parts
+    return labels
+
+
 # https://github.com/dexplo/minimally_sufficient_pandas/blob/master/minimally_sufficient_pandas/_pandas_accessor.py#L42
-def flatten_multiindex(df, on=None):
-    """Flatten MultiIndex to flat index after e.g. groupby, on can be automatic (None) or index or columns"""
-    df = df.copy()
+def flatten_multiindex(df, on=None, sep="_", inplace=False):
+    """Flatten MultiIndex to flat index after e.g. groupby, on can be automatic (None) or index or columns
+    Labels are joined with `sep`, with `inplace` the labels of `df` are replaced
+    rather than copying all of its data first"""
+    if not inplace:
+        df = df.copy()
     if on is None:
         index = hasattr(df.index, "levels")
         columns = hasattr(df.columns, "levels")
@@ -132,15 +991,9 @@ def flatten_multiindex(df, on=None):
         index = on == "index" or on == "both"
         columns = on == "columns" or on == "both"
     if index is True:
-        new_flat_index = [
-            "_".join(str(s) for s in multi_index) for multi_index in df.index.values
-        ]
-        df.index = new_flat_index
+        df.index = _flatten_labels(df.index, sep)
     if columns is True:
-        new_flat_index = [
-            "_".join(str(s) for s in multi_index) for multi_index in df.columns.values
-        ]
-        df.columns = new_flat_index
+        df.columns = _flatten_labels(df.columns, sep)
     return df
 
 
@@ -175,16 +1028,128 @@ def make_bin_edges(desc, left_inf=True, right_inf=True):
     return bins
 
 
+class Binner:
+    """Bin edges compiled once for binning many arrays with `np.searchsorted`
+
+    `bin_series` rebuilds an IntervalIndex and runs `pd.cut` on every call,
+    a Binner keeps the sorted breaks (descending `make_bin_edges` specs are
+    flipped) and turns values into compact integer codes (-1 for NaN or
+    values outside the edges), the IntervalIndex is only built once if a
+    Categorical is asked for.
+
+    binner = Binner(make_bin_edges("0 1 ... 10"))
+    for ser in many_series:
+        binned = binner.cut(ser)  # same as bin_series(ser, bin_edges)"""
+
+    def __init__(self, bin_edges, closed="left"):
+        if closed not in ("left", "right"):
+            raise ValueError(f"closed must be 'left' or 'right', not '{closed}'")
+        breaks = np.asarray(bin_edges, dtype=np.float64)
+        if breaks[0] > breaks[-1]:
+            breaks = breaks[::-1]
+        if (np.diff(breaks) <= 0).any():
+            raise ValueError("bin_edges must be strictly ascending or descending")
+        self.breaks = breaks
+        self.closed = closed
+        self.nbr_bins = breaks.shape[0] - 1
+        self.codes_dtype = np.min_scalar_type(-max(self.nbr_bins, 1))
+        self._intervals = None
+
+    @property
+    def intervals(self):
+        """IntervalIndex of the bins, built on first use"""
+        if self._intervals is None:
+            self._intervals = pd.IntervalIndex.from_breaks(
+                self.breaks, closed=self.closed
+            )
+        return self._intervals
+
+    def codes(self, dist):
+        """Bin number for each value, -1 for NaN or values outside every bin"""
+        values = np.asarray(dist, dtype=np.float64)
+        # a value on a break belongs to the bin it opens if closed on the left
+        side = "right" if self.closed == "left" else "left"
+        codes = np.searchsorted(self.breaks, values, side=side) - 1
+        codes[(codes < 0) | (codes >= self.nbr_bins)] = -1
+        return codes.astype(self.codes_dtype)
+
+    def cut(self, dist):
+        """Categorical of intervals for each value, like `bin_series`"""
+        return pd.Categorical.from_codes(
+            self.codes(dist), categories=self.intervals, ordered=True
+        )
+
+
+class StreamingHistogram:
+    """Bin counts accumulated chunk by chunk for files too big to `bin_series`
+
+    Replaces `bin_series(...).value_counts()` on a whole column, memory only
+    depends on the number of bins. Chunks can come from
+    `pd.read_csv(..., chunksize=...)` or a Parquet `iter_batches()` iterator,
+    histograms built in other processes (with the same edges) can be merged.
+
+    hist = StreamingHistogram(make_bin_edges("-3 -2 ... 3"))
+    hist.update_from(pd.read_csv("big.csv", chunksize=1_000_000), column="dist")
+    hist.labelled_counts(format_to_base_10, prefix="$")"""
+
+    def __init__(self, bin_edges, closed="left"):
+        if isinstance(bin_edges, Binner):
+            self.binner = bin_edges
+        else:
+            self.binner = Binner(bin_edges, closed=closed)
+        self.counts = np.zeros(self.binner.nbr_bins, dtype=np.int64)
+        self.nbr_missing = 0  # NaN or outside every bin, like `value_counts`
+
+    def update(self, chunk):
+        """Add the values in 1 chunk (array, Series or Arrow array)"""
+        codes = self.binner.codes(chunk)
+        in_a_bin = codes >= 0
+        self.counts += np.bincount(codes[in_a_bin], minlength=self.binner.nbr_bins)
+        self.nbr_missing += int(codes.shape[0] - in_a_bin.sum())
+        return self
+
+    def update_from(self, chunks, column=None):
+        """Consume an iterator of chunks, taking `column` from each if given"""
+        for chunk in chunks:
+            if column is not None:
+                chunk = chunk[column]
+            self.update(chunk)
+        return self
+
+    def merge(self, other):
+        """Add the counts from a histogram with the same bins"""
+        if not np.array_equal(self.binner.breaks, other.binner.breaks):
+            raise ValueError("Can only merge histograms with the same bin edges")
+        self.counts += other.counts
+        self.nbr_missing += other.nbr_missing
+        return self
+
+    def value_counts(self):
+        """Counts per interval, as `bin_series(...).value_counts()` would give"""
+        index = pd.CategoricalIndex(
+            self.binner.intervals, categories=self.binner.intervals, ordered=True
+        )
+        return pd.Series(self.counts.copy(), index=index, name="count")
+
+    def labelled_counts(self, format_fn=None, **kwargs):
+        """DataFrame of counts with `apply_labelling` labels as the index"""
+        counts = self.value_counts()
+        counts.index = apply_labelling(counts.index, format_fn, **kwargs)
+        return counts.to_frame()
+
+
 def bin_series(dist, bin_edges):
-    """Bin a series using specified bin_edges"""
+    """Bin a series using specified bin_edges (or a precompiled `Binner`)"""
+    if isinstance(bin_edges, Binner):
+        return bin_edges.cut(dist)
     interval_index = pd.IntervalIndex.from_breaks(bin_edges, closed="left")
     binned = pd.cut(dist, interval_index)
     return binned
 
 
-# TODO make right-closed too
 def label_interval(interval, format_fn=None, **kwargs):
-    """Internal function to make a friendly human interval label e.g. [-1 - 0)"""
+    """Internal function to make a friendly human interval label e.g. [-1 - 0)
+    right-closed intervals give e.g. (-1 - 0], '<= -1' and '> 0'"""
     left = interval.left
     if not np.isinf(left):
         if format_fn is not None:
@@ -193,22 +1158,65 @@ def label_interval(interval, format_fn=None, **kwargs):
     if not np.isinf(right):
         if format_fn is not None:
             right = format_fn(right, **kwargs)
-    if interval.closed_left:
-        if np.isinf(interval.left):
-            label = f"< {right}"
-        elif np.isinf(interval.right):
-            label = f">= {left}"
-        else:
-            label = f"[{left} - {right})"
+    if np.isinf(interval.left):
+        label = f"<= {right}" if interval.closed_right else f"< {right}"
+    elif np.isinf(interval.right):
+        label = f">= {left}" if interval.closed_left else f"> {left}"
+    else:
+        opening = "[" if interval.closed_left else "("
+        closing = "]" if interval.closed_right else ")"
+        label = f"{opening}{left} - {right}{closing}"
 
     return label
 
 
-def apply_labelling(ser, format_fn=None, **kwargs):
-    """Modify index using labelling function"""
-    label_interval_args = partial(label_interval, format_fn=format_fn, **kwargs)
-    new_index = ser.map(label_interval_args)
-    return new_index
+# identical interval bounds get relabelled across many Series, keep recent labels
+cached_label_interval = MemoizedFormatter(label_interval)
+
+
+def _relabel_categorical(codes, labels, ordered):
+    """Build a Categorical from existing `codes` (-1 for missing) and 1 label per
+    old category, labels that collide after formatting share a category"""
+    label_codes, new_categories = pd.factorize(np.asarray(labels, dtype=object))
+    codes = np.asarray(codes)
+    new_codes = np.where(codes >= 0, label_codes[codes], -1)
+    return pd.Categorical.from_codes(
+        new_codes, categories=new_categories, ordered=ordered
+    )
+
+
+def apply_labelling(ser, format_fn=None, use_cache=True, **kwargs):
+    """Modify index using labelling function
+    With `use_cache` labels come from `cached_label_interval`, see its `cache_info()`
+
+    Categoricals of intervals (e.g. from `bin_series`) and interval arrays only
+    have their unique intervals labelled, the result is a Categorical sharing
+    the original codes (wrapped like the input), so labelling 100M binned rows
+    costs the same as labelling the bins"""
+    if use_cache:
+        label_interval_args = cached_label_interval.bind(format_fn=format_fn, **kwargs)
+    else:
+        label_interval_args = partial(label_interval, format_fn=format_fn, **kwargs)
+
+    if isinstance(ser.dtype, pd.CategoricalDtype):
+        values = pd.Categorical(ser)
+        labels = [label_interval_args(interval) for interval in values.categories]
+        new_values = _relabel_categorical(values.codes, labels, values.ordered)
+    elif isinstance(ser.dtype, pd.IntervalDtype):
+        # sorted so the ordered categories follow the intervals, not first appearance
+        codes, uniques = pd.factorize(ser, sort=True)
+        labels = [label_interval_args(interval) for interval in uniques]
+        # interval order is meaningful so keep it for sorting
+        new_values = _relabel_categorical(codes, labels, ordered=True)
+    else:
+        new_index = ser.map(label_interval_args)
+        return new_index
+
+    if isinstance(ser, pd.Series):
+        return pd.Series(new_values, index=ser.index, name=ser.name)
+    if isinstance(ser, pd.Index):
+        return pd.CategoricalIndex(new_values, name=ser.name)
+    return new_values
 
 
 if __name__ == "__main__":
@@ -1,5 +1,11 @@
 """Calculate and estimate 95th CI bounds for a binary value"""
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+import os
+from statistics import NormalDist
 import numpy as np
+import pandas as pd
 
 # WARNING
 # THIS IS ALL VERY ALPHA CODE, IT NEEDS SORTING OUT!
@@ -29,31 +35,638 @@ def calculate_ci(arr):
     return p - se_95, p, p + se_95
 
 
-def calculate_bootstraps(arr, repeats=1000, agg_fn=np.sum):
+# agg_fns that accept `axis=1` so a whole chunk of resamples can be reduced at once
+VECTORISED_AGG_FNS = {np.sum, np.mean, np.var, np.std, np.median, np.min, np.max}
+VECTORISED_QUANTILE_FNS = {np.quantile, np.percentile}
+
+
+def _is_vectorised_agg_fn(agg_fn):
+    """True if `agg_fn` can reduce a 2D (repeats, n) matrix along `axis=1`"""
+    if isinstance(agg_fn, partial):
+        # e.g. partial(np.quantile, q=0.9)
+        return agg_fn.func in VECTORISED_QUANTILE_FNS
+    return agg_fn in VECTORISED_AGG_FNS
+
+
+# cap on resamples per chunk, chunks are the unit of work handed to the workers
+# and each gets its own RNG stream, so this must not depend on `n_jobs`
+MAX_CHUNK_SIZE = 1_000
+
+
+def _calculate_chunk_size(n, itemsize, max_memory):
+    """Number of resamples per chunk so the index matrix and gathered
+    values (n * (8 + itemsize) bytes per resample) fit in `max_memory`"""
+    bytes_per_resample = max(n * (np.dtype(np.intp).itemsize + itemsize), 1)
+    return min(max(int(max_memory // bytes_per_resample), 1), MAX_CHUNK_SIZE)
+
+
+def _make_seed_sequences(seed, nbr_chunks):
+    """Spawn 1 independent SeedSequence per chunk
+    If `seed` is None we draw one from the module-level `rng`"""
+    if seed is None:
+        seed = int(rng.integers(2**63))
+    return np.random.SeedSequence(seed).spawn(nbr_chunks)
+
+
+def _bootstrap_chunk(nbr_in_chunk, seed_seq, arr, agg_fn):
+    """Calculate `nbr_in_chunk` bootstrap statistics using a private RNG stream"""
+    chunk_rng = np.random.default_rng(seed_seq)
+    n = arr.shape[0]
+    masks = chunk_rng.integers(0, n, (nbr_in_chunk, n))
+    if _is_vectorised_agg_fn(agg_fn):
+        return np.asarray(agg_fn(arr[masks], axis=1))
+    # fallback for arbitrary callables, one resample at a time
+    return np.array([agg_fn(arr[mask]) for mask in masks])
+
+
+def _bootstrap_chunk_shared_memory(
+    nbr_in_chunk, seed_seq, shm_name, shape, dtype, agg_fn
+):
+    """Worker process entry point, attaches to `arr` in shared memory rather
+    than receiving a pickled copy with every chunk"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        aggs = _bootstrap_chunk(nbr_in_chunk, seed_seq, arr, agg_fn)
+        del arr  # release the view before closing the buffer
+    finally:
+        shm.close()
+    return aggs
+
+
+def _run_chunks(arr, chunk_sizes, seed_seqs, agg_fn, n_jobs, backend):
+    """Calculate every chunk, serially or on a thread or process pool,
+    results are returned in chunk order"""
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs == 1 or len(chunk_sizes) <= 1:
+        worker_fn = partial(_bootstrap_chunk, arr=arr, agg_fn=agg_fn)
+        return list(map(worker_fn, chunk_sizes, seed_seqs))
+    if backend == "threads":
+        # NumPy releases the GIL for the index generation, gather and reduction
+        worker_fn = partial(_bootstrap_chunk, arr=arr, agg_fn=agg_fn)
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            return list(executor.map(worker_fn, chunk_sizes, seed_seqs))
+    if backend == "processes":
+        # agg_fn must be picklable (e.g. not a lambda) to reach the workers
+        if arr.dtype.hasobject:
+            raise ValueError("backend='processes' needs a non-object arr")
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        try:
+            shared_arr = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+            shared_arr[:] = arr
+            del shared_arr
+            worker_fn = partial(
+                _bootstrap_chunk_shared_memory,
+                shm_name=shm.name,
+                shape=arr.shape,
+                dtype=arr.dtype,
+                agg_fn=agg_fn,
+            )
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                return list(executor.map(worker_fn, chunk_sizes, seed_seqs))
+        finally:
+            shm.close()
+            shm.unlink()
+    raise ValueError(f"backend must be 'threads' or 'processes', not '{backend}'")
+
+
+def _select_percentiles(aggs, percentiles):
+    """Sort bootstrap statistics and pick out the values at `percentiles`"""
+    perc = np.array([int(p * aggs.shape[0]) for p in percentiles])
+    aggs = np.sort(aggs)
+    return aggs[perc]
+
+
+# bincount casts to intp, count this many rows at a time to bound the copy
+BINCOUNT_BLOCK_SIZE = 1 << 20
+
+
+def _value_counts(arr, max_unique):
+    """Sorted distinct values of a bool or integer `arr` and their counts,
+    or None if it has another dtype or spans more than `max_unique` values.
+    Costs a min/max and a blocked `np.bincount`, not a sort"""
+    if arr.ndim != 1 or arr.shape[0] == 0:
+        return None
+    if arr.dtype == np.bool_:
+        as_ints, lo, hi = arr.view(np.uint8), 0, 1
+    elif np.issubdtype(arr.dtype, np.integer):
+        as_ints, lo, hi = arr, int(arr.min()), int(arr.max())
+    else:
+        return None
+    if hi - lo + 1 > max_unique:
+        return None
+    counts = np.zeros(hi - lo + 1, dtype=np.int64)
+    if counts.shape[0] <= 2:
+        # binary flags need 1 comparison, no intp copy
+        counts[-1] = np.count_nonzero(as_ints == hi)
+        counts[0] += arr.shape[0] - counts[-1]  # the same bin if constant
+    else:
+        for start in range(0, arr.shape[0], BINCOUNT_BLOCK_SIZE):
+            block = as_ints[start : start + BINCOUNT_BLOCK_SIZE].astype(np.intp) - lo
+            counts += np.bincount(block, minlength=counts.shape[0])
+    values = np.arange(lo, hi + 1).astype(arr.dtype)
+    seen = counts > 0
+    return values[seen], counts[seen]
+
+
+def _counts_quantile_q(agg_fn):
+    """The quantile (0..1) a median/quantile/percentile `agg_fn` takes, else None"""
+    if agg_fn is np.median:
+        return 0.5
+    if isinstance(agg_fn, partial) and set(agg_fn.keywords) == {"q"}:
+        q = agg_fn.keywords["q"]
+        if np.ndim(q) == 0 and agg_fn.func is np.quantile:
+            return q
+        if np.ndim(q) == 0 and agg_fn.func is np.percentile:
+            return q / 100
+    return None
+
+
+def _can_agg_counts(agg_fn):
+    """True if `_agg_counts` computes `agg_fn` without expanding the values"""
+    moments = (np.sum, np.mean, np.var, np.std, np.min, np.max)
+    return agg_fn in moments or _counts_quantile_q(agg_fn) is not None
+
+
+def _agg_counts(values, draws, agg_fn):
+    """`agg_fn` of each resample described by a row of `draws`, the count of
+    each of the sorted `values` in it, as `agg_fn(arr[mask], axis=1)` would give"""
+    n = draws[0].sum()
+    if agg_fn is np.sum:
+        return draws @ values
+    if agg_fn is np.mean:
+        return draws @ values / n
+    if agg_fn in (np.var, np.std):
+        # centre first so the squares don't lose precision for large values
+        centred = values - values.mean()
+        variances = draws @ centred**2 / n - (draws @ centred / n) ** 2
+        return variances if agg_fn is np.var else np.sqrt(variances)
+    if agg_fn is np.min:
+        return values[(draws > 0).argmax(axis=1)]
+    if agg_fn is np.max:
+        return values[values.shape[0] - 1 - (draws[:, ::-1] > 0).argmax(axis=1)]
+    q = _counts_quantile_q(agg_fn)
+    if q is not None:
+        # linear interpolation between the values at the ranks around q * (n - 1)
+        cumulative = np.cumsum(draws, axis=1)
+        position = q * (n - 1)
+        lower = values[(cumulative > np.floor(position)).argmax(axis=1)]
+        upper = values[(cumulative > np.ceil(position)).argmax(axis=1)]
+        return lower + (upper - lower) * (position - np.floor(position))
+    # anything else has to see the resample, 1 at a time
+    return np.array([agg_fn(np.repeat(values, row)) for row in draws])
+
+
+def _bootstrap_counts(values, counts, repeats, agg_fn, max_memory, seed):
+    """Bootstrap statistics drawing each resample as multinomial counts over
+    the distinct `values`, O(len(values)) per resample rather than O(n)"""
+    order = np.argsort(values, kind="stable")
+    values, counts = values[order], np.asarray(counts, dtype=np.int64)[order]
+    n = int(counts.sum())
+    pvals = counts / n
+    # draws plus a couple of same-shaped temporaries per resample
+    chunk_size = _calculate_chunk_size(values.shape[0], 3 * 8, max_memory)
+    chunk_sizes = [
+        min(chunk_size, repeats - start) for start in range(0, repeats, chunk_size)
+    ]
+    if len(chunk_sizes) == 0:
+        return np.array([])
+    aggs = []
+    for nbr_in_chunk, seed_seq in zip(
+        chunk_sizes, _make_seed_sequences(seed, len(chunk_sizes))
+    ):
+        chunk_rng = np.random.default_rng(seed_seq)
+        draws = chunk_rng.multinomial(n, pvals, size=nbr_in_chunk)
+        aggs.append(np.asarray(_agg_counts(values, draws, agg_fn)))
+    return np.concatenate(aggs)
+
+
+def calculate_bootstraps(
+    arr,
+    repeats=1000,
+    agg_fn=np.sum,
+    chunk_size=None,
+    max_memory=256 * 1024**2,
+    n_jobs=1,
+    backend="threads",
+    seed=None,
+    counts=None,
+    use_counts="auto",
+    max_unique=1_000,
+):
     """Calculate a bootstrap statistic (default `sum`)
     Given an array calculate `repeats` bootstrap samples
-    taking the `agg_fn` of each and return `repeats` results"""
+    taking the `agg_fn` of each and return `repeats` results
+
+    Common `agg_fn`s (np.sum, np.mean, np.var, np.std, np.median, np.min, np.max
+    and `partial(np.quantile, q=...)`) are computed on a 2D (chunk_size, n) matrix
+    of resample indices with `axis=1`, anything else is called once per resample.
+    `chunk_size` resamples are drawn at a time, if None it is derived so that
+    each chunk uses at most `max_memory` bytes
+
+    `n_jobs` workers (-1 for all cores) share the chunks using `backend`
+    'threads' or 'processes' (arr is placed in shared memory). Each chunk has
+    its own generator spawned from `seed`, so for a given seed and chunk_size
+    the result is identical whatever `n_jobs` is
+
+    A resample of binary or low-cardinality data only depends on how many
+    times it drew each distinct value, so these are drawn as multinomial
+    counts (serially, in milliseconds even for 500M rows) when `counts` is
+    given (`arr` then holds the distinct values, e.g. [0, 1] and [9_000, 1_000]
+    for a 10% conversion flag) or when `use_counts` is "auto" and `arr` is bool
+    or integer spanning at most `max_unique` values with an `agg_fn` from the
+    list above. `use_counts=True` also finds the counts of any other dtype
+    with `np.unique`, False always resamples the raw values. Results are
+    equivalent but not identical to the raw path for the same seed"""
+    arr = np.asarray(arr)
+    if counts is None and use_counts:
+        value_counts = None
+        if use_counts == "auto":
+            if _can_agg_counts(agg_fn):
+                value_counts = _value_counts(arr, max_unique)
+        else:
+            value_counts = _value_counts(arr, max_unique)
+            if value_counts is None:
+                value_counts = np.unique(arr, return_counts=True)
+        if value_counts is not None:
+            arr, counts = value_counts
+    if counts is not None:
+        return _bootstrap_counts(arr, counts, repeats, agg_fn, max_memory, seed)
     n = arr.shape[0]
-    aggs = []
-    for it in range(repeats):
-        mask = rng.integers(0, n, n)
-        aggs.append(agg_fn(arr[mask]))
-    aggs = np.array(aggs)
+    if chunk_size is None:
+        chunk_size = _calculate_chunk_size(n, arr.itemsize, max_memory)
+    chunk_sizes = [
+        min(chunk_size, repeats - start) for start in range(0, repeats, chunk_size)
+    ]
+    if len(chunk_sizes) == 0:
+        return np.array([])
+    seed_seqs = _make_seed_sequences(seed, len(chunk_sizes))
+    aggs = _run_chunks(arr, chunk_sizes, seed_seqs, agg_fn, n_jobs, backend)
+    aggs = np.concatenate(aggs)
     return aggs
 
 
 def calculate_bootstrap_ci(
-    arr, percentiles=[0.025, 0.5, 0.975], repeats=1000, agg_fn=np.mean
+    arr,
+    percentiles=[0.025, 0.5, 0.975],
+    repeats=1000,
+    agg_fn=np.mean,
+    chunk_size=None,
+    max_memory=256 * 1024**2,
+    n_jobs=1,
+    backend="threads",
+    seed=None,
+    counts=None,
+    use_counts="auto",
+    max_unique=1_000,
 ):
     """Bootstrap CI
     Given percentiles, calculate a repeated statistic (default is the mean) on the bootstrap
-    and return the values at the matching percentiles"""
-    perc = np.array([int(p * repeats) for p in percentiles])
-    aggs = calculate_bootstrap(arr, repeats, agg_fn)
-    aggs.sort()
+    and return the values at the matching percentiles
+    See `calculate_bootstraps` for `counts` and the binary/low-cardinality fast path"""
+    aggs = calculate_bootstraps(
+        arr,
+        repeats,
+        agg_fn,
+        chunk_size=chunk_size,
+        max_memory=max_memory,
+        n_jobs=n_jobs,
+        backend=backend,
+        seed=seed,
+        counts=counts,
+        use_counts=use_counts,
+        max_unique=max_unique,
+    )
+    return _select_percentiles(aggs, percentiles)
+
+
+def calculate_ci_grouped(df, by, col):
+    """Normal-approximation 95% CI (as `calculate_ci`) for every group in one pass
+    Returns a DataFrame indexed by the `by` group keys with lower, mean, upper columns
+    """
+    stats = df.groupby(by, observed=True)[col].agg(["mean", "count"])
+    p = stats["mean"]
+    se_95 = np.sqrt((p * (1 - p)) / stats["count"]) * 1.96
+    return pd.DataFrame({"lower": p - se_95, "mean": p, "upper": p + se_95})
+
+
+def _bootstrap_grouped(df, by, col, repeats, agg, max_memory, seed):
+    """Bootstrap statistics of every group, shape (repeats, nbr_groups), and
+    the sorted group keys. Rows are sorted so each group is a contiguous
+    segment, every resample draws indices within each row's own segment
+    and `np.add.reduceat` sums the segments, so there's no per-group loop"""
+    if agg not in ("mean", "sum"):
+        raise ValueError(f"agg must be 'mean' or 'sum', not '{agg}'")
+    grouped = df.groupby(by, observed=True, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    sizes = grouped.size()
+    # rows with a missing key are in no group (NaN code), as `calculate_ci_grouped`
+    in_group = ~np.isnan(codes) if codes.dtype.kind == "f" else slice(None)
+    codes = codes[in_group].astype(np.intp)
+    order = np.argsort(codes, kind="stable")
+    values = df[col].to_numpy(dtype=np.float64)[in_group][order]
+    codes = codes[order]
+    lengths = sizes.to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    # for each row, where its segment starts and how long the segment is
+    row_offsets = offsets[codes]
+    row_lengths = lengths[codes]
+
+    n = values.shape[0]
+    repeats_per_block = _calculate_chunk_size(n, values.itemsize, max_memory)
+    seed_seqs = _make_seed_sequences(seed, -(-repeats // repeats_per_block))
+    aggs = []
+    for start, seed_seq in zip(range(0, repeats, repeats_per_block), seed_seqs):
+        nbr_in_block = min(repeats_per_block, repeats - start)
+        block_rng = np.random.default_rng(seed_seq)
+        masks = row_offsets + block_rng.integers(0, row_lengths, (nbr_in_block, n))
+        sums = np.add.reduceat(values[masks], offsets, axis=1)
+        aggs.append(sums / lengths if agg == "mean" else sums)
+    return np.concatenate(aggs), sizes.index
+
+
+def _select_percentiles_per_column(aggs, percentiles):
+    """`_select_percentiles` down each column of (repeats, nbr_columns) `aggs`"""
+    perc = np.array([int(p * aggs.shape[0]) for p in percentiles])
+    aggs = np.sort(aggs, axis=0)
     return aggs[perc]
 
 
+def calculate_bootstrap_ci_grouped(
+    df,
+    by,
+    col,
+    percentiles=[0.025, 0.5, 0.975],
+    repeats=1000,
+    agg="mean",
+    max_memory=256 * 1024**2,
+    seed=None,
+):
+    """Bootstrap CI (as `calculate_bootstrap_ci`) for every group in one pass,
+    resampling all groups together with no per-group Python loop. `agg` is
+    'mean' or 'sum'. Returns a DataFrame indexed by the `by` group keys with
+    lower, mean (or sum) and upper columns as `calculate_ci_grouped`, taken at
+    the 3 `percentiles` of the bootstraps"""
+    if len(percentiles) != 3:
+        raise ValueError("percentiles must be 3 values for lower, middle and upper")
+    aggs, index = _bootstrap_grouped(df, by, col, repeats, agg, max_memory, seed)
+    selected = _select_percentiles_per_column(aggs, percentiles)
+    return pd.DataFrame(selected.T, index=index, columns=["lower", agg, "upper"])
+
+
+def _z_score(ci):
+    """Two-sided normal critical value, 1.96 for a 95% `ci`"""
+    return NormalDist().inv_cdf(0.5 + ci / 2)
+
+
+def _ab_frame(experiments, method, diff, diff_bounds, ratio, ratio_bounds):
+    """Tidy rows (1 per experiment and measure) for `compare_proportions`/`compare_means`"""
+    frames = []
+    for measure, estimate, (lower, upper) in [
+        ("difference", diff, diff_bounds),
+        ("ratio", ratio, ratio_bounds),
+    ]:
+        frame = pd.DataFrame(
+            {"lower": lower, "estimate": estimate, "upper": upper}, index=experiments
+        )
+        frame.insert(0, "method", method)
+        frame.insert(0, "measure", measure)
+        frames.append(frame)
+    return pd.concat(frames)
+
+
+def _ab_tidy(experiments, analytic, bootstrapped):
+    """Stack the analytic (and bootstrap) rows into 1 long DataFrame"""
+    frames = [analytic] if bootstrapped is None else [analytic, bootstrapped]
+    result = pd.concat(frames).rename_axis(experiments.names).reset_index()
+    return result.sort_values(
+        list(experiments.names) + ["measure", "method"], kind="stable"
+    ).reset_index(drop=True)
+
+
+def compare_proportions(
+    successes_control,
+    trials_control,
+    successes_treatment,
+    trials_treatment,
+    experiments=None,
+    ci=0.95,
+    repeats=1000,
+    bootstrap=True,
+    max_memory=256 * 1024**2,
+    seed=None,
+):
+    """Treatment vs control CIs of the difference (pt - pc) and ratio (pt / pc)
+    of proportions for many experiments at once, from per-experiment arrays
+    of successes and trials (e.g. conversions and visitors) per arm
+
+    Analytic CIs are the normal approximation used by `calculate_ci` for the
+    difference and the log method (Katz) for the ratio. The bootstrap draws
+    each arm's resampled successes as 1 binomial per experiment and repeat
+    (its sufficient statistic), so the cost doesn't depend on the trials.
+    Returns a tidy DataFrame, 1 row per experiment, measure and method, with
+    lower, estimate (the observed value) and upper columns"""
+    xc, nc, xt, nt = (
+        np.asarray(arr, dtype=np.float64)
+        for arr in (
+            successes_control,
+            trials_control,
+            successes_treatment,
+            trials_treatment,
+        )
+    )
+    if experiments is None:
+        experiments = np.arange(xc.shape[0])
+    experiments = pd.Index(experiments, name=getattr(experiments, "name", None))
+    if experiments.name is None:
+        experiments = experiments.rename("experiment")
+    z = _z_score(ci)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pc, pt = xc / nc, xt / nt
+        diff, ratio = pt - pc, pt / pc
+        se_diff = np.sqrt(pc * (1 - pc) / nc + pt * (1 - pt) / nt)
+        se_log_ratio = np.sqrt(1 / xt - 1 / nt + 1 / xc - 1 / nc)
+        analytic = _ab_frame(
+            experiments,
+            "analytic",
+            diff,
+            (diff - z * se_diff, diff + z * se_diff),
+            ratio,
+            (ratio * np.exp(-z * se_log_ratio), ratio * np.exp(z * se_log_ratio)),
+        )
+    bootstrapped = None
+    if bootstrap:
+        # 4 (repeats, experiments) float64 arrays live per block
+        nbr_experiments = xc.shape[0]
+        repeats_per_block = _calculate_chunk_size(nbr_experiments, 3 * 8, max_memory)
+        seed_seqs = _make_seed_sequences(seed, -(-repeats // repeats_per_block))
+        nc_int, nt_int = nc.astype(np.int64), nt.astype(np.int64)
+        diffs, ratios = [], []
+        for start, seed_seq in zip(range(0, repeats, repeats_per_block), seed_seqs):
+            nbr_in_block = min(repeats_per_block, repeats - start)
+            block_rng = np.random.default_rng(seed_seq)
+            size = (nbr_in_block, nbr_experiments)
+            pc_draws = block_rng.binomial(nc_int, np.nan_to_num(pc), size)
+            pt_draws = block_rng.binomial(nt_int, np.nan_to_num(pt), size)
+            # an arm with 0 trials gives NaN proportions, as in the analytic rows
+            with np.errstate(invalid="ignore", divide="ignore"):
+                pc_star, pt_star = pc_draws / nc, pt_draws / nt
+                diffs.append(pt_star - pc_star)
+                ratios.append(pt_star / pc_star)
+        bootstrapped = _ab_bootstrap_frame(
+            experiments, diff, np.concatenate(diffs), ratio, np.concatenate(ratios), ci
+        )
+    return _ab_tidy(experiments, analytic, bootstrapped)
+
+
+def _ab_bootstrap_frame(experiments, diff, diff_aggs, ratio, ratio_aggs, ci):
+    """Tidy bootstrap rows from (repeats, experiments) resampled differences and ratios"""
+    percentiles = [0.5 - ci / 2, 0.5 + ci / 2]
+    diff_bounds = _select_percentiles_per_column(diff_aggs, percentiles)
+    # NaN ratios (0 / 0 resamples) sort last, like inf, so they only reach the upper bound
+    ratio_bounds = _select_percentiles_per_column(ratio_aggs, percentiles)
+    return _ab_frame(experiments, "bootstrap", diff, diff_bounds, ratio, ratio_bounds)
+
+
+def compare_means(
+    df,
+    experiment,
+    arm,
+    col,
+    control="control",
+    treatment="treatment",
+    ci=0.95,
+    repeats=1000,
+    bootstrap=True,
+    max_memory=256 * 1024**2,
+    seed=None,
+):
+    """Treatment vs control CIs of the difference and ratio of means of `col`
+    for every `experiment` (a column name or list of them) at once, from raw
+    rows labelled `control` or `treatment` in the `arm` column
+
+    Analytic CIs use Welch's standard error for the difference and the delta
+    method on the log ratio. The bootstrap resamples every experiment and
+    arm in the same vectorised draws (as `calculate_bootstrap_ci_grouped`),
+    each arm within itself. Returns the same tidy DataFrame as
+    `compare_proportions`, experiments missing an arm get NaNs"""
+    by = [experiment] if isinstance(experiment, str) else list(experiment)
+    df = df[df[arm].isin([control, treatment])]
+    stats = df.groupby(by + [arm], observed=True, sort=True)[col].agg(
+        ["mean", "var", "count"]
+    )
+    stats = stats.unstack(arm)
+    experiments = stats.index
+    mc, mt = stats[("mean", control)], stats[("mean", treatment)]
+    vc, vt = stats[("var", control)], stats[("var", treatment)]
+    nc, nt = stats[("count", control)], stats[("count", treatment)]
+    z = _z_score(ci)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        diff, ratio = (mt - mc).to_numpy(), (mt / mc).to_numpy()
+        se_diff = np.sqrt(vc / nc + vt / nt).to_numpy()
+        se_log_ratio = np.sqrt(vc / (nc * mc**2) + vt / (nt * mt**2)).to_numpy()
+        analytic = _ab_frame(
+            experiments,
+            "analytic",
+            diff,
+            (diff - z * se_diff, diff + z * se_diff),
+            ratio,
+            (ratio * np.exp(-z * se_log_ratio), ratio * np.exp(z * se_log_ratio)),
+        )
+    bootstrapped = None
+    if bootstrap:
+        aggs, groups = _bootstrap_grouped(
+            df, by + [arm], col, repeats, "mean", max_memory, seed
+        )
+        # append a NaN column for experiments without one of the arms
+        aggs = np.concatenate([aggs, np.full((aggs.shape[0], 1), np.nan)], axis=1)
+        columns = {}
+        for arm_value in (control, treatment):
+            keys = [
+                (key if isinstance(key, tuple) else (key,)) + (arm_value,)
+                for key in experiments
+            ]
+            positions = groups.get_indexer(pd.MultiIndex.from_tuples(keys))
+            columns[arm_value] = aggs[:, positions]  # -1 picks the NaN column
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bootstrapped = _ab_bootstrap_frame(
+                experiments,
+                diff,
+                columns[treatment] - columns[control],
+                ratio,
+                columns[treatment] / columns[control],
+                ci,
+            )
+    return _ab_tidy(experiments, analytic, bootstrapped)
+
+
+class PoissonBootstrap:
+    """Streaming (online) bootstrap of the mean or sum for data that won't fit in RAM
+
+    Each of `repeats` replicates weights every incoming row with a Poisson(1)
+    count instead of resampling with replacement, which only needs the running
+    weighted sum and weight total per replicate. Memory is proportional to
+    `repeats` (plus a `max_memory` bounded working block), not to the rows seen.
+
+    Accumulators fed with different partitions can be combined with `merge`,
+    give each one a different `seed` so their weights are independent.
+
+    pb = PoissonBootstrap(repeats=1000, seed=0)
+    for chunk in pd.read_csv(..., chunksize=1_000_000):
+        pb.update(chunk['converted'].to_numpy())
+    pb.ci()  # same percentiles as `calculate_bootstrap_ci`"""
+
+    def __init__(self, repeats=1000, agg="mean", seed=None, max_memory=256 * 1024**2):
+        if agg not in ("mean", "sum"):
+            raise ValueError(f"agg must be 'mean' or 'sum', not '{agg}'")
+        self.repeats = repeats
+        self.agg = agg
+        self.max_memory = max_memory
+        if seed is None:
+            seed = int(rng.integers(2**63))
+        self.rng = np.random.default_rng(seed)
+        self.weighted_sums = np.zeros(repeats)
+        self.weight_totals = np.zeros(repeats)
+        self.nbr_rows = 0
+
+    def update(self, chunk):
+        """Add a chunk of values to every replicate"""
+        chunk = np.asarray(chunk, dtype=np.float64).ravel()
+        # weights are a (repeats, rows) matrix, only make `rows` as large as fits
+        rows_per_block = max(int(self.max_memory // (self.repeats * 8)), 1)
+        for start in range(0, chunk.shape[0], rows_per_block):
+            block = chunk[start : start + rows_per_block]
+            weights = self.rng.poisson(1.0, (self.repeats, block.shape[0]))
+            self.weighted_sums += weights @ block
+            self.weight_totals += weights.sum(axis=1)
+        self.nbr_rows += chunk.shape[0]
+        return self
+
+    def merge(self, other):
+        """Fold the replicates of another accumulator (e.g. another partition) into this one"""
+        if other.repeats != self.repeats or other.agg != self.agg:
+            raise ValueError(
+                "Can only merge accumulators with the same repeats and agg"
+            )
+        self.weighted_sums += other.weighted_sums
+        self.weight_totals += other.weight_totals
+        self.nbr_rows += other.nbr_rows
+        return self
+
+    def bootstraps(self):
+        """Return `repeats` bootstrap statistics for the rows seen so far"""
+        if self.agg == "sum":
+            return self.weighted_sums.copy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # a replicate could have drawn 0 weight for every row on tiny inputs
+            return self.weighted_sums / self.weight_totals
+
+    def ci(self, percentiles=[0.025, 0.5, 0.975]):
+        """Bootstrap CI, the values at the matching percentiles"""
+        return _select_percentiles(self.bootstraps(), percentiles)
+
+
 def test_calculate_bootstrap():
     arr = np.ones(10)
     bootstraps = calculate_bootstraps(arr, repeats=10_000)
@@ -1,4 +1,12 @@
-from simpler.labelling import format_to_base_10
+import warnings
+import numpy as np
+import pandas as pd
+from simpler.labelling import (
+    format_to_base_10,
+    format_array_to_base_10,
+    MemoizedFormatter,
+    cached_format_to_base_10,
+)
 
 
 def test_format_to_base_10():
@@ -28,3 +36,67 @@ def test_format_to_base_10():
     assert format_to_base_10(1, precision=0, postfix="%") == "1%"
     assert format_to_base_10(-1, precision=0, postfix="%") == "-1%"
     assert format_to_base_10(0.1, precision=1, postfix="%") == "0.1%"
+
+
+def test_format_array_to_base_10():
+    rng = np.random.default_rng(0)
+    nums = np.concatenate(
+        [
+            rng.normal(0, 1e6, 1_000),
+            rng.normal(0, 1, 1_000),
+            rng.integers(-5_000, 5_000, 1_000),
+            # ties in decimal that aren't ties in binary, and exact binary ties
+            [0, -0.0, 0.125, 2.675, 1.005, 0.045, 999.995, 999_999.5],
+            [1, 0.1, 0.01, 1000, 1000.1, -1, 1e9, 0.001, -0.001],
+        ]
+    )
+    for kwargs in [
+        dict(),
+        dict(precision=0),
+        dict(precision=1, prefix="£", trim_0_decimals=True),
+        dict(precision=2, trim_0_decimals=True),
+        dict(precision=3, postfix="%"),
+    ]:
+        expected = [format_to_base_10(num, **kwargs) for num in nums]
+        assert format_array_to_base_10(nums, **kwargs).tolist() == expected
+
+    # NaN and inf go through the scalar path, without RuntimeWarnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        labels = format_array_to_base_10([np.nan, 1, np.inf, -np.inf])
+    assert labels.tolist() == ["nan", "1.00", "inf", "-inf"]
+    assert format_array_to_base_10([]).shape == (0,)
+
+    ser = pd.Series([1000, 2_500_000], index=["a", "b"], name="cost")
+    labels = format_array_to_base_10(ser, prefix="£", precision=1)
+    assert (labels.index == ser.index).all()
+    assert labels.name == "cost"
+    assert labels.tolist() == ["£1.0k", "£2.5M"]
+
+
+def test_memoized_formatter():
+    fmt = MemoizedFormatter(format_to_base_10, maxsize=2)
+    assert fmt(1000, precision=0) == "1k"
+    assert fmt(1000, precision=0) == "1k"
+    assert fmt.cache_info()["hits"] == 1
+    assert fmt.cache_info()["misses"] == 1
+    # different options are a different key, list options are made hashable
+    assert fmt(1000, precision=0, suffixes=["", "K"]) == "1K"
+    assert fmt(1000, precision=1) == "1.0k"
+    # maxsize=2 so the least recently used entry was evicted
+    assert fmt.cache_info()["currsize"] == 2
+    assert fmt(1000, precision=0) == "1k"
+    assert fmt.cache_info()["misses"] == 4
+    # equal values of different types don't share a label
+    label_fmt = MemoizedFormatter(lambda value: str(value))
+    assert [label_fmt(1), label_fmt(1.0), label_fmt(True)] == ["1", "1.0", "True"]
+    intervals = [pd.Interval(0, 1), pd.Interval(0.0, 1.0)]
+    assert [label_fmt(value) for value in intervals] == ["(0, 1]", "(0.0, 1.0]"]
+
+    bound = fmt.bind(prefix="£", precision=1)
+    assert [bound(v) for v in [2_500_000, 2_500_000]] == ["£2.5M", "£2.5M"]
+    assert fmt.cache_info()["hits"] == 2
+
+    fmt.cache_clear()
+    assert fmt.cache_info() == {"hits": 0, "misses": 0, "maxsize": 2, "currsize": 0}
+    assert cached_format_to_base_10(-2_000_000, prefix="£", precision=1) == "-£2.0M"
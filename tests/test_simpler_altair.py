@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simpler.simpler_altair import (
+    to_plottable,
+    write_data,
+    histogram_data,
+    aggregate_data,
+    histogram_chart,
+)
+from simpler.simpler_pandas import make_bin_edges
+from simpler.labelling import format_to_base_10
+
+
+def test_to_plottable():
+    df = pd.DataFrame(
+        {"binned": pd.cut([1, 2, 3], [0, 2, 4]), "cat": pd.Categorical(["a", "b", "a"])}
+    ).set_index(pd.Index([5, 6, 7], name="idx"))
+    df["intervals"] = pd.arrays.IntervalArray.from_breaks([0, 1, 2, 3])
+    plottable = to_plottable(df)
+    assert list(plottable.columns) == ["idx", "binned", "cat", "intervals"]
+    assert plottable["binned"].tolist() == ["(0, 2]", "(0, 2]", "(2, 4]"]
+    assert plottable["intervals"].dtype == object
+    # categoricals stay categorical, with string categories
+    assert plottable["binned"].cat.categories.tolist() == ["(0, 2]", "(2, 4]"]
+    assert plottable["cat"].cat.categories.tolist() == ["a", "b"]
+    # a default index isn't turned into a column
+    assert list(to_plottable(df.reset_index(drop=True)).columns) == [
+        "binned",
+        "cat",
+        "intervals",
+    ]
+
+
+def test_histogram_data_and_write(tmp_path):
+    ser = pd.Series(np.random.default_rng(0).normal(size=100_000))
+    data = histogram_data(ser, make_bin_edges("-1 0 ... 1"), format_to_base_10)
+    assert list(data.columns) == ["bin", "count"]
+    assert data["bin"].tolist() == [
+        "< -1.00",
+        "[-1.00 - 0.00)",
+        "[0.00 - 1.00)",
+        ">= 1.00",
+    ]
+    assert data["count"].sum() == 100_000
+
+    url = write_data(data, tmp_path / "hist.csv")
+    assert url.endswith("hist.csv")
+    # kilobytes on disk however many rows were binned
+    assert (tmp_path / "hist.csv").stat().st_size < 1_000
+    pd.testing.assert_frame_equal(pd.read_csv(url), data.astype({"bin": object}))
+    url = write_data(data, tmp_path / "hist.json", base_url="https://example.com/")
+    assert url == "https://example.com/hist.json"
+    with pytest.raises(ValueError):
+        write_data(data, tmp_path / "hist.parquet")
+
+
+def test_aggregate_data():
+    df = pd.DataFrame(
+        {"price": [5, 15, 15, 25], "shop": ["a", "a", "b", "b"], "qty": [1, 2, 3, 4]}
+    )
+    data = aggregate_data(df, "shop")
+    assert data.to_dict("list") == {"shop": ["a", "b"], "count": [2, 2]}
+    data = aggregate_data(
+        df, "price", y="qty", agg="sum", bin_edges=make_bin_edges("0 10 ... 20")
+    )
+    assert data["price"].tolist() == [
+        "< 0.0",
+        "[0.0 - 10.0)",
+        "[10.0 - 20.0)",
+        ">= 20.0",
+    ]
+    assert data["qty"].tolist() == [0, 1, 5, 4]
+
+
+def test_histogram_chart(tmp_path):
+    pytest.importorskip("altair")
+    ser = pd.Series(np.arange(1_000), name="value")
+    chart = histogram_chart(
+        ser, make_bin_edges("0 500 ... 1000"), tmp_path / "hist.csv", title="Values"
+    )
+    spec = chart.to_dict()
+    assert spec["data"]["url"].endswith("hist.csv")
+    assert "datasets" not in spec  # nothing inlined
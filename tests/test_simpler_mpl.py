@@ -0,0 +1,110 @@
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from simpler.simpler_mpl import (
+    _render_spec,
+    _worker_figures,
+    downsample_minmax,
+    DownsampledLine,
+    render_figures,
+    set_commas,
+)
+
+
+def test_downsample_minmax():
+    y = np.random.default_rng(0).normal(size=100_000)
+    x = np.arange(y.shape[0])
+    positions = downsample_minmax(x, y, 100)
+    assert positions.shape[0] <= 400
+    assert (np.diff(positions) > 0).all()
+    # the extremes and both ends always survive
+    assert {0, x.shape[0] - 1, y.argmin(), y.argmax()} <= set(positions)
+
+    # a zoomed window keeps 1 neighbour either side
+    positions = downsample_minmax(x, y, 10, x_range=(1_000.5, 2_000.5))
+    assert positions[0] == 1_000 and positions[-1] == 2_001
+
+    # few enough points are kept as they are
+    np.testing.assert_array_equal(downsample_minmax(x[:30], y[:30], 10), x[:30])
+
+
+def test_downsampled_line():
+    ser = pd.Series(
+        np.cumsum(np.random.default_rng(0).normal(size=1_000_000)),
+        index=pd.date_range("2020-01-01", periods=1_000_000, freq="min"),
+    )
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=100)
+    line = DownsampledLine(ax, ser.index, ser)
+    assert line.nbr_plotted <= 4 * 400
+    assert line.reduction_ratio > 500
+    assert "reduction" in repr(line)
+    nbr_plotted = line.nbr_plotted
+
+    # zooming re-downsamples just the visible part
+    x_data = line.line.get_xdata()
+    ax.set_xlim(x_data[10], x_data[20])
+    assert line.line.get_xdata().min() <= x_data[10]
+    assert line.nbr_plotted < nbr_plotted
+    line.disconnect()
+    ax.set_xlim(x_data[0], x_data[-1])
+    assert line.nbr_plotted < nbr_plotted
+    plt.close(fig)
+
+
+def test_set_commas():
+    fig, ax = plt.subplots()
+    ax.plot(np.linspace(-0.5, 0.5, 10), np.arange(10) * -1_000_000)
+    set_commas(ax, x_axis=True, y_axis=True)
+    fig.canvas.draw()
+    x_labels = [label.get_text() for label in ax.get_xticklabels()]
+    y_labels = [label.get_text() for label in ax.get_yticklabels()]
+    plt.close(fig)
+    # fractional ticks aren't truncated to "0"
+    assert "-0.4" in x_labels and "0.2" in x_labels and "0" in x_labels
+    assert "-8,000,000" in y_labels and "0" in y_labels
+
+
+def test_render_figures(tmp_path):
+    specs = [
+        {
+            "path": tmp_path / f"line{i}.png",
+            "args": (np.arange(10), np.arange(10) * i),
+            "kwargs": {"label": f"line {i}"},
+            "styles": {"title": f"Line {i}", "ylabel": "value"},
+            "rotate_labels": {"x_axis": True},
+        }
+        for i in range(4)
+    ]
+    specs.append({"path": tmp_path / "bars.svg", "kind": "bar", "args": (["a"], [1])})
+    specs.append(
+        {
+            "path": tmp_path / "commas.png",
+            "args": (np.linspace(-0.5, 0.5, 10), np.arange(10) * -1000),
+            "kwargs": {"label": "commas"},
+            "set_commas": {"x_axis": True, "y_axis": True},
+        }
+    )
+    specs.append({"path": tmp_path / "broken.png", "kind": "not_a_method"})
+    timings = render_figures(specs, n_jobs=2)
+    assert timings["path"].tolist() == [str(spec["path"]) for spec in specs]
+    assert timings["error"].iloc[:6].isna().all()
+    assert "not_a_method" in timings["error"].iloc[6]
+    assert (timings["total_seconds"] > 0).all()
+    for spec in specs[:6]:
+        assert spec["path"].stat().st_size > 0
+    assert not (tmp_path / "broken.png").exists()
+
+    # the same spec drawn here, its saved ticks keep their fractions
+    commas_spec = dict(specs[5], path=tmp_path / "commas_here.png")
+    assert _render_spec(commas_spec)[-1] is None
+    fig, ax = _worker_figures[((8, 6), 100)]
+    x_labels = [label.get_text() for label in ax.get_xticklabels()]
+    y_labels = [label.get_text() for label in ax.get_yticklabels()]
+    plt.close(fig)
+    _worker_figures.clear()
+    assert "-0.4" in x_labels and "0.2" in x_labels
+    assert "-8,000" in y_labels
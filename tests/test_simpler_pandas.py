@@ -1,3 +1,5 @@
+import io
+import tracemalloc
 import numpy as np
 import pandas as pd
 import pytest
@@ -9,17 +11,59 @@ from simpler.simpler_pandas import (
     bin_series,
     apply_labelling,
     sanity_check,
+    sanity_scan,
     flatten_multiindex,
     display,
     label_interval,
     show_df_details,
+    memory_report,
+    optimize_dtypes,
     check_series_is_ordered,
     show_all,
+    describe_fast,
+    SummaryStats,
+    PagedView,
     to_datetime_helper,
+    cached_label_interval,
+    Binner,
+    StreamingHistogram,
+    value_counts_pct,
+    to_datetime_chunked,
+    to_datetime_cached,
+    to_numeric_cached,
+    clear_parse_cache,
+    _parse_caches,
+    find_first_unordered,
+    find_first_unordered_in_chunks,
 )
 from simpler.labelling import format_to_base_10
 
-# TODO value_counts_pct has no tests yet
+
+def test_value_counts_pct(capsys):
+    ser = pd.Series(["apple"] * 50 + ["banana"] * 30 + ["cherry"] * 15 + [None] * 5)
+    df = value_counts_pct(ser, rows=2)
+    assert df["count"].tolist() == [50, 30, 15, 5]
+    np.testing.assert_allclose(df["pct"], [50, 30, 15, 5])
+    np.testing.assert_allclose(df["pct_cum"], [50, 80, 95, 100])
+    captured = capsys.readouterr()
+    # only the top rows are rendered
+    assert "banana" in captured.out and "cherry" not in captured.out
+    assert "Total rows not shown 2 of 4" in captured.out
+
+
+def test_value_counts_pct_approx_top_k():
+    rng = np.random.default_rng(0)
+    ser = pd.Series(rng.zipf(1.5, 20_000))
+    exact = ser.value_counts()
+    k = 20
+    df = value_counts_pct(ser, rows=5, approx_top_k=k, chunk_size=1_000)
+    assert df.shape[0] <= k
+    # the true count lies between count and count_max, within the error bound
+    assert (df["count"] <= exact[df.index]).all()
+    assert (df["count_max"] >= exact[df.index]).all()
+    assert (df["count_max"] - df["count"] <= ser.shape[0] / (k + 1)).all()
+    assert df.index[0] == exact.index[0]
+
 
 def test_check_series_is_ordered():
     ser_asc = pd.Series([1, 2, 3, 4, 5])
@@ -34,6 +78,58 @@ def test_check_series_is_ordered():
     assert check_series_is_ordered(ser_no_order, ascending=False) == False
 
 
+def test_find_first_unordered():
+    ser = pd.Series([1, 2, 2, 3, 1, 5], index=[9, 8, 7, 6, 5, 4])
+    assert find_first_unordered(ser) == 4
+    assert find_first_unordered(ser, strict=True) == 2
+    assert find_first_unordered(ser[:4]) is None
+    assert check_series_is_ordered(ser[:4], strict=True) == False
+    assert find_first_unordered(ser, ascending=False) == 1
+    # the violation is found whichever block it falls in
+    arr = np.arange(100)
+    arr[77] = 0
+    assert find_first_unordered(arr, block_size=10) == 77
+    assert find_first_unordered(np.array([1.0, np.nan, 2.0])) == 1
+    assert find_first_unordered(pd.Series([], dtype=float)) is None
+
+    # ordered categoricals follow their categories, not the values' sort order
+    levels = pd.Categorical(
+        ["low", "mid", "high", "high"], categories=["low", "mid", "high"], ordered=True
+    )
+    assert check_series_is_ordered(pd.Series(levels))
+    assert find_first_unordered(levels, strict=True) == 3
+    assert find_first_unordered(pd.Series(levels[::-1])) == 2
+    assert find_first_unordered(pd.Series(levels).shift(1)) == 1  # missing
+    # tz-aware datetimes, NaT is out of order
+    when = pd.Series(
+        pd.date_range("2024-03-30", periods=4, freq="D", tz="Europe/London")
+    )
+    assert check_series_is_ordered(when)
+    assert find_first_unordered(when.iloc[::-1]) == 1
+    when.iloc[2] = pd.NaT
+    assert find_first_unordered(when) == 2
+    assert find_first_unordered(pd.Series(pd.to_timedelta([1, 2, 1], unit="s"))) == 2
+
+
+def test_find_first_unordered_in_chunks():
+    chunks = [np.array([1, 2, 3]), np.array([]), np.array([3, 4]), np.array([5, 6])]
+    assert find_first_unordered_in_chunks(chunks) is None
+    assert find_first_unordered_in_chunks(chunks, strict=True) == 3
+    # a violation on the boundary between chunks
+    chunks = [np.array([1, 2, 3]), np.array([2, 4])]
+    assert find_first_unordered_in_chunks(chunks) == 3
+    # a violation inside a later chunk
+    chunks = [pd.DataFrame({"ts": [1, 2]}), pd.DataFrame({"ts": [3, 5, 4]})]
+    assert find_first_unordered_in_chunks(chunks, column="ts") == 4
+    chunks = [np.array([3, 2]), np.array([1, 0])]
+    assert find_first_unordered_in_chunks(chunks, ascending=False) is None
+    # ordered categorical chunks, including across the boundary
+    order = ["low", "mid", "high"]
+    levels = pd.Categorical(order, categories=order, ordered=True)
+    assert find_first_unordered_in_chunks([levels[:2], levels[2:]]) is None
+    assert find_first_unordered_in_chunks([levels[1:], levels[:1]]) == 2
+
+
 def test_to_datetime_helper():
     res = to_datetime_helper(pd.Series(["Jan 2023", "Feb 2024"]))
     expected = [datetime(2023, 1, 1), datetime(2024, 2, 1)]
@@ -47,6 +143,90 @@ def test_to_datetime_helper():
     assert res.isna().sum() == 1
 
 
+def test_to_datetime_helper_prints_errors(capsys):
+    ser = pd.Series(["Jan 2023", "xx", "Feb 2024", "yy", "zz"])
+    to_datetime_helper(ser, trim_at=2)
+    captured = capsys.readouterr()
+    assert "3 errors seen in conversion" in captured.out
+    assert "3 is too many errors, trimming to 2" in captured.out
+    assert "Row 1 'xx'" in captured.out
+    assert "Row 3 'yy'" in captured.out
+    assert "zz" not in captured.out
+
+
+def test_to_datetime_chunked():
+    ser = pd.Series(["Jan 2023", "xx", "Feb 2024", "yy", "Mar 2025", "zz"] * 10)
+    expected = pd.to_datetime(ser, errors="coerce", format="%b %Y")
+    for n_jobs in [1, 2]:
+        res, errors = to_datetime_chunked(ser, trim_at=4, chunk_size=7, n_jobs=n_jobs)
+        assert res.equals(expected)
+        assert errors.nbr_errors == 30
+        assert errors.nbr_rows == 60
+        # the first failures, in order, with their original index
+        assert errors.samples.tolist() == ["xx", "yy", "zz", "xx"]
+        assert errors.samples.index.tolist() == [1, 3, 5, 7]
+    assert "30 errors seen in conversion" in str(errors)
+
+
+def test_to_datetime_cached():
+    clear_parse_cache()
+    ser = pd.Series(["Jan 2023", "Feb 2024", "xx", None] * 3, index=range(10, 22))
+    expected = pd.to_datetime(ser, errors="coerce", format="%b %Y")
+    assert to_datetime_cached(ser).equals(expected)
+    assert len(_parse_caches) == 0  # the cache is opt-in
+    res = to_datetime_cached(ser, use_cache=True)
+    assert res.equals(expected)
+    # 2nd call with a new value uses the cache for the rest
+    ser2 = pd.Series(["Mar 2025", "Jan 2023"])
+    res = to_datetime_cached(ser2, use_cache=True)
+    assert res.tolist() == [datetime(2025, 3, 1), datetime(2023, 1, 1)]
+    # all hits, no parsing at all
+    assert to_datetime_cached(ser, use_cache=True).equals(expected)
+
+
+def test_parse_cache_is_bounded():
+    clear_parse_cache()
+    months = pd.date_range("1900-01-01", periods=1_200, freq="MS").strftime("%b %Y")
+    ser = pd.Series(months)
+    to_datetime_cached(ser, use_cache=True, cache_maxsize=1_000)
+    cache = _parse_caches[("datetime", "%b %Y")]
+    assert len(cache) == 1_000
+    assert "Jan 1900" not in cache  # least recently used went first
+    # a hit becomes most recently used, so survives the next evictions
+    to_datetime_cached(pd.Series(["Jan 1901"]), use_cache=True, cache_maxsize=1_000)
+    to_datetime_cached(pd.Series(["Mar 2025"]), use_cache=True, cache_maxsize=1_000)
+    assert "Jan 1901" in cache and "Feb 1901" not in cache
+
+    # a small call only looks up its own values, it doesn't copy the cache
+    tracemalloc.start()
+    try:
+        res = to_datetime_cached(ser.iloc[-10:], use_cache=True, cache_maxsize=1_000)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert res.iloc[-1] == datetime(1999, 12, 1)
+    assert peak < 100_000
+    clear_parse_cache()
+
+
+def test_to_numeric_cached():
+    clear_parse_cache()
+    ser = pd.Series(["£1,234.50", "$5", " 7 ", "bad", None, "£1,234.50"], name="cost")
+    for use_cache in [False, True, True]:
+        res = to_numeric_cached(ser, use_cache=use_cache)
+        assert res.name == "cost"
+        np.testing.assert_array_equal(res, [1234.5, 5.0, 7.0, np.nan, np.nan, 1234.5])
+    res = to_numeric_cached(pd.Series(["1_000 €"]), thousands="_", use_cache=False)
+    assert res[0] == 1000
+
+    # cached floats mixed with newly parsed ints keep their fractions
+    clear_parse_cache()
+    to_numeric_cached(pd.Series(["1.5"]), use_cache=True)
+    res = to_numeric_cached(pd.Series(["1.5", "2"]), use_cache=True)
+    np.testing.assert_array_equal(res, [1.5, 2.0])
+    clear_parse_cache()
+
+
 def test_show_all(capsys):
     # TODO run coverage, currently we don't test everything
     df = pd.DataFrame({"a": [1, 2, 3]})
@@ -55,6 +235,47 @@ def test_show_all(capsys):
     assert "0  1" in captured.out
 
 
+def test_paged_view(capsys):
+    df = pd.DataFrame({f"c{n}": np.arange(25) * n for n in range(5)})
+    pv = PagedView(df, page_size=10, column_page_size=2, large=20, sample_size=5)
+    assert (pv.nbr_pages, pv.nbr_column_pages) == (3, 3)
+    assert pv.window(2).shape == (5, 2)
+    assert pv.window(-1, column_page=2).columns.tolist() == ["c4"]
+    assert pv.window(start=3, stop=7).index.tolist() == [3, 4, 5, 6]
+    with pytest.raises(IndexError):
+        pv.window(3)
+
+    pv.show(1, column_page=1)
+    captured = capsys.readouterr()
+    assert "page 2 of 3, rows 10-20 of 25, columns 2-4 of 5" in captured.out
+    assert "c2" in captured.out and "c0" not in captured.out
+    pv.next()
+    assert "page 3 of 3, rows 20-25 of 25" in capsys.readouterr().out
+    pv.next()  # stays on the last page
+    assert pv.page == 2
+
+    # summary comes from a small sample, computed once at construction
+    assert pv.summary.loc["count", "c0"] == 5
+    pv.show_summary()
+    assert "sample of 5 of 25 rows" in capsys.readouterr().out
+    assert PagedView(df).summary is None
+
+    # the summary sample doesn't touch every row of a big frame
+    big = pd.DataFrame({"a": np.arange(2_000_000), "b": np.zeros(2_000_000)})
+    tracemalloc.start()
+    try:
+        pv_big = PagedView(big, sample_size=1_000)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert pv_big.summary.loc["count", "a"] == 1_000
+    assert peak < 2_000_000  # a permutation of the rows alone is 16MB
+
+    pv = PagedView(df["c1"], page_size=10)
+    pv.show(start=23, stop=None)
+    assert "rows 23-25 of 25\n" in capsys.readouterr().out
+
+
 def test_show_df_details(capsys):
     # TODO capture more stdout and check I agree
     # this will also flag if a future Pandas version changes their internals!
@@ -67,6 +288,149 @@ def test_show_df_details(capsys):
     assert "is consolidated True, single block True" in captured.out
 
 
+def test_describe_fast():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "floats": rng.normal(size=1_001),
+            "ints": rng.integers(0, 100, 1_001),
+            "nullable": pd.array([1, None, 3] * 333 + [4, 5], dtype="Int64"),
+            "text": "a",
+        }
+    )
+    df.loc[::7, "floats"] = np.nan
+    summary = describe_fast(df)
+    assert summary.attrs["ignored_columns"] == ["text"]
+    assert summary.loc["floats", "nulls"] == 143
+    assert summary.loc["nullable", "dtype"] == "Int64"
+    assert not summary["approximate"].any()
+    expected = df.describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95]).T
+    stats = ["count", "mean", "std", "min", "5%", "25%", "50%", "75%", "95%", "max"]
+    np.testing.assert_allclose(
+        summary[stats].astype(float), expected.loc[summary.index, stats].astype(float)
+    )
+
+    # chunked and merged summaries match the whole frame
+    merged = SummaryStats().update_from(
+        df.iloc[start : start + 300] for start in range(0, 600, 300)
+    )
+    merged.merge(SummaryStats().update(df.iloc[600:]))
+    np.testing.assert_allclose(
+        merged.result()[stats].astype(float), summary[stats].astype(float)
+    )
+    with pytest.raises(ValueError):
+        merged.merge(SummaryStats(percentiles=[0.5]))
+
+
+def test_describe_fast_approximate():
+    ser = pd.Series(np.random.default_rng(0).permutation(100_000), name="x")
+    # 1 frame stays exact whatever its size
+    summary = describe_fast(ser.to_frame(), approx_threshold=10_000)
+    assert not summary.loc["x", "approximate"]
+    assert summary.loc["x", "5%"] == ser.quantile(0.05)
+    # chunks accumulating past the threshold switch to the sketch
+    chunks = (
+        ser.iloc[start : start + 5_000].to_frame() for start in range(0, 100_000, 5_000)
+    )
+    summary = SummaryStats(approx_threshold=10_000).update_from(chunks).result()
+    assert summary.loc["x", "approximate"]
+    assert summary.loc["x", "min"] == 0 and summary.loc["x", "max"] == 99_999
+    for pct in [5, 25, 50, 75, 95]:
+        # rank error of the sketch is well under 1%
+        assert abs(summary.loc["x", f"{pct}%"] - pct * 1_000) < 1_000
+
+
+def test_memory_report():
+    df = pd.DataFrame(
+        {
+            "small_ints": np.arange(1_000),
+            "negative_ints": -np.arange(1_000),
+            "floats": np.linspace(0, 1, 1_000),
+            "halves": np.arange(1_000) / 2,
+            "labels": ["a", "b"] * 500,
+        }
+    )
+    report = memory_report(df, sample_size=100)
+    assert report.loc["small_ints", "suggested_dtype"] == "int16"
+    assert report.loc["small_ints", "saving_bytes"] == 6_000
+    assert report.loc["negative_ints", "suggested_dtype"] == "int16"
+    # linspace values don't survive float32, halves do
+    assert report.loc["floats", "suggested_dtype"] is None
+    assert report.loc["halves", "suggested_dtype"] == "float32"
+    assert report.loc["labels", "suggested_dtype"] == "category"
+    assert report.loc["labels", "memory_estimated"]
+    assert not report.loc["small_ints", "memory_estimated"]
+    # the 2 int columns are consolidated into 1 block
+    assert report.loc["small_ints", "block"] == report.loc["negative_ints", "block"]
+    assert report.loc["small_ints", "block"] != report.loc["floats", "block"]
+    assert not report["is_view"].any()
+    assert memory_report(df.iloc[:10])["is_view"].all()
+
+
+def test_memory_report_samples_cheaply():
+    n = 2_000_000
+    df = pd.DataFrame(
+        {
+            "ints": np.arange(n),
+            "floats": np.linspace(0, 1, n),
+            "text": pd.Series(["a", "bb"], dtype=object).iloc[np.arange(n) % 2].values,
+        }
+    )
+    tracemalloc.start()
+    try:
+        report = memory_report(df, sample_size=10_000)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # permuting every row (as `df.sample` does) would need n * 8 = 16MB per column
+    assert peak < 4_000_000
+    assert report.loc["text", "memory_estimated"]
+    assert not report.loc["ints", "memory_estimated"]
+
+
+def test_optimize_dtypes():
+    df = pd.DataFrame(
+        {
+            "ints": np.arange(1_000) - 500,
+            "floats": np.linspace(0, 1, 1_000),
+            "halves": np.arange(1_000) / 2,
+            "labels": ["a", "b"] * 500,
+            "flags": [True, False] * 500,
+        }
+    )
+    new_df, table = optimize_dtypes(df)
+    assert new_df.dtypes.astype(str).tolist() == [
+        "int16",
+        "float64",
+        "float32",
+        "category",
+        "bool",
+    ]
+    # values are unchanged
+    for col in df.columns:
+        assert (new_df[col] == df[col]).all()
+    assert table.loc["ints", "saving_bytes"] == 6_000
+    assert table.loc["floats", "saving_bytes"] == 0
+    assert (table["bytes_after"] <= table["bytes_before"]).all()
+    assert new_df.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+
+    # non-negative ints stay signed so arithmetic doesn't wrap around
+    df = pd.DataFrame({"a": [1, 2, 3], "b": [3, 2, 1]})
+    new_df, _ = optimize_dtypes(df)
+    assert new_df.dtypes.astype(str).tolist() == ["int8", "int8"]
+    assert (new_df["a"] - new_df["b"]).tolist() == [-2, 0, 2]
+
+
+def test_optimize_dtypes_arrow_strings():
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"ids": [f"user_{n}" for n in range(100)]})
+    new_df, table = optimize_dtypes(df)
+    assert table.loc["ids", "dtype_after"] == "string"
+    assert new_df["ids"].tolist() == df["ids"].tolist()
+    new_df, table = optimize_dtypes(df, arrow_strings=False)
+    assert table.loc["ids", "dtype_after"] == "object"
+
+
 # TODO replace with warns check https://docs.pytest.org/en/latest/how-to/capture-warnings.html#warns
 def test_sanity_check():
     df = pd.DataFrame({" a": [1, 2], "b": [3, 4], "c ": [5, 6]})
@@ -83,6 +447,72 @@ def test_sanity_check():
         sanity_check(df)
 
 
+def test_sanity_scan():
+    df = pd.DataFrame(
+        {
+            " a": [" x", "y", "y\xa0", "z", None] * 2,
+            "b": [1, "1", 2.0, "q", "q"] * 2,
+            "c": ["ok", "ok", "H\u0435llo", "ok", "ok"] * 2,  # Cyrillic e
+            "d": [1, 2, 3, 4, 5] * 2,
+        },
+        index=range(100, 110),
+    )
+    report = sanity_scan(df, sample_size=2)
+    assert list(report.columns) == ["column", "issue", "count", "sample_rows"]
+    issues = report.set_index(["column", "issue"])
+    assert issues.loc[(" a", "column name whitespace"), "count"] == 1
+    assert issues.loc[(" a", "leading/trailing whitespace"), "count"] == 4
+    whitespace_rows = issues.loc[(" a", "leading/trailing whitespace"), "sample_rows"]
+    assert whitespace_rows == [100, 102]
+    assert issues.loc[(" a", "non-breaking space"), "count"] == 2
+    assert issues.loc[("b", "mixed types"), "count"] == 4
+    assert issues.loc[("c", "non-ascii"), "count"] == 2
+    assert "d" not in report["column"].values
+    assert report.shape[0] == 5
+    assert sanity_scan(df, n_jobs=2).equals(sanity_scan(df))
+    assert sanity_scan(pd.DataFrame({"a": ["x", "y"]})).shape[0] == 0
+
+    # the majority type is by rows, not by unique values
+    mostly_str = pd.DataFrame({"a": ["a"] * 1_000 + [1, 2, 3]})
+    report = sanity_scan(mostly_str, sample_size=3)
+    assert report["issue"].tolist() == ["mixed types"]
+    assert report["count"].tolist() == [3]
+    assert report["sample_rows"].tolist() == [[1_000, 1_001, 1_002]]
+    # string dtype columns are scanned too
+    strings = pd.DataFrame({"a": [" x", "y", None]}, dtype="string")
+    report = sanity_scan(strings)
+    assert report["issue"].tolist() == ["leading/trailing whitespace"]
+    assert report["sample_rows"].tolist() == [[0]]
+
+
+def test_sanity_scan_arrow_strings():
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"ids": [f"user_{n}" for n in range(100)] + [" user_100"]})
+    new_df, _ = optimize_dtypes(df)
+    report = sanity_scan(new_df)
+    assert report["issue"].tolist() == ["leading/trailing whitespace"]
+    assert report["sample_rows"].tolist() == [[100]]
+
+
+def test_sanity_scan_one_column_at_a_time():
+    values = np.array(["a", "b ", "c"], dtype=object)[np.arange(200_000) % 3]
+    wide = pd.DataFrame({f"col{i}": values for i in range(8)})
+
+    def peak_bytes(df):
+        tracemalloc.start()
+        try:
+            report = sanity_scan(df)
+            return tracemalloc.get_traced_memory()[1], report
+        finally:
+            tracemalloc.stop()
+
+    peak_one, report_one = peak_bytes(wide[["col0"]])
+    peak_wide, report_wide = peak_bytes(wide)
+    assert report_wide.shape[0] == 8 * report_one.shape[0]
+    # codes for 1 column are alive at a time, not 8 columns' worth
+    assert peak_wide < 1.5 * peak_one
+
+
 def test_flatten_multiindex():
     # TODO need to make a dual multiindex test
     df = pd.DataFrame({"a": ["a", "a", "b", "b"], "b": [0, 1, 2, 3], "c": [6, 7, 8, 9]})
@@ -106,6 +536,45 @@ def test_flatten_multiindex():
     assert df_flattened.columns[3] == "b_3"
 
 
+def test_flatten_multiindex_sep_and_inplace():
+    df = pd.DataFrame(
+        {"a": ["a", None, "b"], "b": [0, 1, 2], "c": [6.5, 7.5, 8.5], "d": [1, 2, 3]}
+    )
+    df_multi = df.set_index(["a", "b", "c"])
+    expected = ["-".join(str(s) for s in values) for values in df_multi.index.values]
+    df_flattened = flatten_multiindex(df_multi, sep="-")
+    assert list(df_flattened.index) == expected
+    assert list(df_flattened.index) == ["a-0-6.5", "nan-1-7.5", "b-2-8.5"]
+    # the original is untouched unless inplace
+    assert isinstance(df_multi.index, pd.MultiIndex)
+    res = flatten_multiindex(df_multi, inplace=True)
+    assert res is df_multi
+    assert df_multi.index[2] == "b_2_8.5"
+
+    # missing datetimes are "NaT" as in the plain join, NUL characters survive
+    df = pd.DataFrame(
+        {
+            "when": pd.to_datetime(["2020-01-01", None, "2020-01-03"]),
+            "what": ["x\0", "y", None],
+            "c": [1, 2, 3],
+        }
+    )
+    df_multi = df.set_index(["when", "what"])
+    expected = ["_".join(str(s) for s in values) for values in df_multi.index.values]
+    assert list(flatten_multiindex(df_multi).index) == expected
+    assert expected == ["2020-01-01 00:00:00_x\0", "NaT_y", "2020-01-03 00:00:00_nan"]
+    # as do timedelta and period levels
+    df_multi = pd.DataFrame(
+        {
+            "took": pd.to_timedelta([1, None], unit="s"),
+            "month": pd.PeriodIndex([None, "2020-01"], freq="M"),
+            "c": [1, 2],
+        }
+    ).set_index(["took", "month"])
+    flattened = flatten_multiindex(df_multi).index
+    assert list(flattened) == ["0 days 00:00:01_NaT", "NaT_2020-01"]
+
+
 def test_make_bin_edges():
     bins = make_bin_edges("1 2 ... 5")
     assert (bins == np.array([-np.inf, 1, 2, 3, 4, 5, np.inf])).all()
@@ -141,6 +610,72 @@ def test_bin_series():
     display(counted.value_counts().sort_index(ascending=True))
 
 
+def test_binner():
+    dist = np.array([-100, 0, 5, 1000, np.nan, -2000])
+    bin_edges = [-np.inf, -1000, 0, 1000]
+    binner = Binner(bin_edges)
+    expected = bin_series(dist, bin_edges)
+    binned = binner.cut(dist)
+    assert binned.equals(expected)
+    assert binner.codes(dist).tolist() == [1, 2, 2, -1, -1, 0]
+    assert binner.codes(dist).dtype == np.int8
+    # bin_series accepts a Binner
+    assert bin_series(dist, binner).equals(expected)
+
+    binner = Binner(bin_edges, closed="right")
+    assert binner.codes(dist).tolist() == [1, 1, 2, 2, -1, 0]
+    assert binner.intervals.closed == "right"
+
+    # descending edges from make_bin_edges are flipped
+    binner = Binner(make_bin_edges("5 4 ... 0"))
+    assert binner.intervals[0].left == -np.inf
+    assert binner.codes([-1, 0, 4.5, 99]).tolist() == [0, 1, 5, 6]
+
+
+def test_streaming_histogram():
+    rng = np.random.default_rng(0)
+    dist = rng.normal(size=10_000)
+    dist[::100] = np.nan
+    bin_edges = make_bin_edges("-2 -1 ... 2")
+    expected = bin_series(dist, bin_edges).value_counts()
+
+    hist = StreamingHistogram(bin_edges)
+    for chunk in np.array_split(dist, 7):
+        hist.update(chunk)
+    assert hist.value_counts().equals(expected)
+    assert hist.nbr_missing == 100
+
+    # chunks from read_csv, split over 2 histograms and merged
+    csv = io.StringIO(pd.DataFrame({"dist": dist}).to_csv(index=False))
+    chunks = pd.read_csv(csv, chunksize=1_000)
+    hist1 = StreamingHistogram(bin_edges)
+    hist2 = StreamingHistogram(Binner(bin_edges))
+    for n, chunk in enumerate(chunks):
+        (hist1 if n % 2 else hist2).update_from([chunk], column="dist")
+    hist1.merge(hist2)
+    assert (hist1.value_counts().values == expected.values).all()
+
+    labelled = hist1.labelled_counts(format_to_base_10, precision=0)
+    assert list(labelled.columns) == ["count"]
+    assert list(labelled.index) == [
+        "< -2",
+        "[-2 - -1)",
+        "[-1 - 0)",
+        "[0 - 1)",
+        "[1 - 2)",
+        ">= 2",
+    ]
+    with pytest.raises(ValueError):
+        hist1.merge(StreamingHistogram(make_bin_edges("0 1 ... 2")))
+
+    # right-closed bins count values on a break into the bin below, labelled so
+    hist = StreamingHistogram(make_bin_edges("0 1 ... 2"), closed="right")
+    hist.update(np.array([-1.0, 0.0, 0.5, 1.0, 2.0, 3.0]))
+    counts = hist.labelled_counts(format_to_base_10, precision=0)
+    assert counts.index.tolist() == ["<= 0", "(0 - 1]", "(1 - 2]", "> 2"]
+    assert counts["count"].tolist() == [2, 2, 1, 1]
+
+
 def test_label_interval():
     bin_edges = [-np.inf, -1000, 0, np.inf]
     int_index = pd.IntervalIndex.from_breaks(bin_edges, closed="left")
@@ -171,6 +706,12 @@ def test_label_interval():
         == "[-£1k - £0)"
     )
 
+    int_index = pd.IntervalIndex.from_breaks(bin_edges, closed="right")
+    labels = [label_interval(interval, format_to_base_10) for interval in int_index]
+    assert labels == ["<= -1.00k", "(-1.00k - 0.00]", "> 0.00"]
+    assert label_interval(pd.Interval(0, 1, closed="both")) == "[0 - 1]"
+    assert label_interval(pd.Interval(0, 1, closed="neither")) == "(0 - 1)"
+
 
 def test_apply_labelling():
     items = [
@@ -201,6 +742,47 @@ def test_apply_labelling():
     assert (vc.index[3:4] == ["[0.3 - 0.4)"]).all()
 
 
+def test_apply_labelling_categorical():
+    items = np.array([0.5, 1.5, 1.5, np.nan, 3.0] * 1_000)
+    bin_edges = make_bin_edges("0 1 ... 2")
+    counted = bin_series(items, bin_edges)
+    labelled = apply_labelling(counted, format_to_base_10, precision=0)
+    assert isinstance(labelled, pd.Categorical)
+    assert labelled.ordered
+    assert list(labelled.categories) == ["< 0", "[0 - 1)", "[1 - 2)", ">= 2"]
+    # the codes are shared, missing values stay missing
+    assert (labelled.codes == counted.codes).all()
+    assert labelled[:5].tolist()[:3] == ["[0 - 1)", "[1 - 2)", "[1 - 2)"]
+    assert pd.isna(labelled[3])
+
+    # a Series keeps its index and name
+    ser = pd.Series(counted, name="binned")
+    labelled = apply_labelling(ser, format_to_base_10, precision=0)
+    assert labelled.name == "binned"
+    assert labelled.dtype == "category"
+    assert labelled.iloc[4] == ">= 2"
+
+    # plain interval arrays are factorized first
+    intervals = pd.IntervalIndex.from_breaks(bin_edges, closed="left")
+    labelled = apply_labelling(intervals[[1, 1, 2]], format_to_base_10, precision=0)
+    assert isinstance(labelled, pd.CategoricalIndex)
+    assert list(labelled) == ["[0 - 1)", "[0 - 1)", "[1 - 2)"]
+
+    # out of order intervals still give categories ordered by interval
+    labelled = apply_labelling(
+        pd.Series(intervals[[3, 1, 2, 0]]), format_to_base_10, precision=0
+    )
+    assert labelled.tolist() == [">= 2", "[0 - 1)", "[1 - 2)", "< 0"]
+    assert list(labelled.cat.categories) == ["< 0", "[0 - 1)", "[1 - 2)", ">= 2"]
+    assert labelled.sort_values().tolist() == ["< 0", "[0 - 1)", "[1 - 2)", ">= 2"]
+    assert (labelled.iloc[0] > labelled).iloc[1:].all()
+
+    # equal intervals with int and float bounds don't share a cached label
+    for left, right, label in [(0, 1, "[0 - 1)"), (0.0, 1.0, "[0.0 - 1.0)")]:
+        interval = pd.Interval(left, right, closed="left")
+        assert apply_labelling(pd.Series([interval])).tolist() == [label]
+
+
 def test_apply_labelling_percent():
     items = [0, 0.1, 0.8, 0.99, 1.0]
     df = pd.DataFrame({"items": items})
@@ -224,6 +806,22 @@ def test_apply_labelling_percent():
     ).all()
     assert (vc.values == [0, 2, 0, 0, 0, 2, 1]).all()
 
+    # labelling the same bins again is served from the cache
+    hits = cached_label_interval.cache_info()["hits"]
+    labels = apply_labelling(
+        counted.value_counts().index, format_to_base_10, prefix="", precision=1
+    )
+    assert (labels == vc.index).all()
+    assert cached_label_interval.cache_info()["hits"] == hits + 7
+    labels = apply_labelling(
+        counted.value_counts().index,
+        format_to_base_10,
+        prefix="",
+        precision=1,
+        use_cache=False,
+    )
+    assert (labels == vc.index).all()
+
     items = [0, 10, 80, 99, 100]
     # df = pd.DataFrame({"items": items})
     bin_edges = make_bin_edges("0 20 ... 100")
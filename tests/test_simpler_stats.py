@@ -0,0 +1,278 @@
+from functools import partial
+import numpy as np
+import pytest
+import pandas as pd
+
+from simpler.simpler_stats import (
+    calculate_ci,
+    calculate_bootstraps,
+    calculate_bootstrap_ci,
+    PoissonBootstrap,
+    calculate_ci_grouped,
+    calculate_bootstrap_ci_grouped,
+    compare_proportions,
+    compare_means,
+)
+
+
+def test_calculate_bootstraps_chunked():
+    arr = np.ones(10)
+    # chunk_size doesn't divide repeats, the last chunk is smaller
+    bootstraps = calculate_bootstraps(arr, repeats=1_001, chunk_size=100)
+    assert bootstraps.shape == (1_001,)
+    assert (bootstraps == 10).all()
+
+    arr = np.arange(100)
+    for agg_fn in [np.sum, np.mean, np.var, np.median, partial(np.quantile, q=0.9)]:
+        bootstraps = calculate_bootstraps(
+            arr, repeats=500, agg_fn=agg_fn, chunk_size=7, use_counts=False
+        )
+        assert bootstraps.shape == (500,)
+        assert bootstraps.min() >= 0
+
+    # a tiny memory budget still makes progress 1 resample at a time
+    bootstraps = calculate_bootstraps(arr, repeats=20, max_memory=1)
+    assert bootstraps.shape == (20,)
+
+
+def test_calculate_bootstraps_fallback_agg_fn():
+    arr = np.arange(10)
+    # an arbitrary callable goes through the per-resample path
+    bootstraps = calculate_bootstraps(
+        arr, repeats=50, agg_fn=lambda x: x.max() - x.min()
+    )
+    assert bootstraps.shape == (50,)
+    assert bootstraps.min() >= 0
+    assert bootstraps.max() <= 9
+
+
+def test_calculate_bootstraps_counts():
+    rng = np.random.default_rng(0)
+    flag = rng.binomial(1, 0.1, 20_000)
+    for agg_fn in [np.sum, np.mean, np.std, np.median, partial(np.quantile, q=0.9)]:
+        raw = calculate_bootstraps(flag, agg_fn=agg_fn, seed=0, use_counts=False)
+        fast = calculate_bootstraps(flag, agg_fn=agg_fn, seed=0)
+        assert fast.shape == raw.shape
+        assert abs(fast.mean() - raw.mean()) <= 0.1 * raw.std() + 1e-12
+        assert abs(fast.std() - raw.std()) <= 0.1 * raw.std() + 1e-12
+
+    # pre-aggregated value/count pairs give the same draws as detected counts
+    values, counts = np.array([0, 1]), np.bincount(flag)
+    np.testing.assert_array_equal(
+        calculate_bootstrap_ci(values, counts=counts, seed=1),
+        calculate_bootstrap_ci(flag, seed=1),
+    )
+    np.testing.assert_array_equal(
+        calculate_bootstrap_ci(flag.astype(bool), seed=1),
+        calculate_bootstrap_ci(flag, seed=1),
+    )
+
+    # small integers and forced np.unique for floats
+    dice = rng.integers(1, 7, 10_000).astype(np.int8)
+    assert calculate_bootstraps(dice, agg_fn=np.min, repeats=10).tolist() == [1] * 10
+    lower, mid, upper = calculate_bootstrap_ci(dice.astype(np.float64), use_counts=True)
+    assert lower < mid < upper and abs(mid - 3.5) < 0.05
+
+    # an arbitrary callable expands each resample from its counts
+    bootstraps = calculate_bootstraps(
+        np.array([2.0, 5.0]), counts=[3, 1], repeats=20, agg_fn=lambda x: x.size
+    )
+    assert (bootstraps == 4).all()
+
+
+def test_calculate_bootstrap_ci():
+    arr = np.zeros(1_000)
+    arr[:500] = 1
+    lower, mid, upper = calculate_bootstrap_ci(arr, repeats=2_000)
+    assert lower < mid < upper
+    assert 0.4 < lower and upper < 0.6
+    ci_lower, ci_mean, ci_upper = calculate_ci(arr)
+    assert ci_mean == 0.5
+    assert abs(ci_lower - lower) < 0.02
+
+
+def test_calculate_bootstraps_reproducible_across_n_jobs():
+    arr = np.arange(1_000, dtype=np.float64)
+    serial = calculate_bootstraps(arr, repeats=2_500, chunk_size=300, seed=42)
+    threaded = calculate_bootstraps(
+        arr, repeats=2_500, chunk_size=300, seed=42, n_jobs=4
+    )
+    processes = calculate_bootstraps(
+        arr, repeats=2_500, chunk_size=300, seed=42, n_jobs=2, backend="processes"
+    )
+    np.testing.assert_array_equal(serial, threaded)
+    np.testing.assert_array_equal(serial, processes)
+
+    different = calculate_bootstraps(arr, repeats=2_500, chunk_size=300, seed=43)
+    assert not (serial == different).all()
+
+    ci = calculate_bootstrap_ci(arr, repeats=1_000, seed=1, n_jobs=-1)
+    np.testing.assert_array_equal(
+        ci, calculate_bootstrap_ci(arr, repeats=1_000, seed=1)
+    )
+
+
+def test_poisson_bootstrap_streaming_and_merge():
+    rng = np.random.default_rng(0)
+    arr = rng.binomial(1, 0.3, 20_000)
+
+    pb = PoissonBootstrap(repeats=1_000, seed=1, max_memory=1_000_000)
+    for chunk in np.array_split(arr, 7):
+        pb.update(chunk)
+    assert pb.nbr_rows == arr.shape[0]
+    lower, mid, upper = pb.ci()
+    assert lower < mid < upper
+    exact_lower, exact_mid, exact_upper = calculate_bootstrap_ci(
+        arr, repeats=1_000, seed=1
+    )
+    assert abs(mid - exact_mid) < 0.005
+    assert abs((upper - lower) - (exact_upper - exact_lower)) < 0.005
+
+    # two partitions merged look like one stream
+    pb1 = PoissonBootstrap(repeats=1_000, seed=2).update(arr[:10_000])
+    pb2 = PoissonBootstrap(repeats=1_000, seed=3).update(arr[10_000:])
+    pb1.merge(pb2)
+    assert pb1.nbr_rows == arr.shape[0]
+    assert abs(pb1.ci()[1] - exact_mid) < 0.005
+
+    pb_sum = PoissonBootstrap(repeats=100, agg="sum", seed=4).update(np.ones(100))
+    assert pb_sum.bootstraps().shape == (100,)
+    assert abs(pb_sum.bootstraps().mean() - 100) < 5
+
+
+def test_calculate_ci_grouped():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "country": np.repeat(["uk", "us", "fr"], 1_000),
+            "campaign": np.tile(["a", "b"], 1_500),
+            "converted": rng.binomial(1, 0.2, 3_000),
+        }
+    )
+    res = calculate_ci_grouped(df, ["country", "campaign"], "converted")
+    assert res.shape == (6, 3)
+    assert list(res.columns) == ["lower", "mean", "upper"]
+    for (country, campaign), row in res.iterrows():
+        mask = (df.country == country) & (df.campaign == campaign)
+        expected = calculate_ci(df.loc[mask, "converted"].to_numpy())
+        np.testing.assert_allclose(row.to_numpy(), expected)
+
+    res_bs = calculate_bootstrap_ci_grouped(
+        df, ["country", "campaign"], "converted", repeats=500, seed=0
+    )
+    assert res_bs.shape == (6, 3)
+    assert (res_bs.index == res.index).all()
+    assert list(res_bs.columns) == list(res.columns)
+    assert (res_bs["lower"] <= res_bs["mean"]).all()
+    assert (res_bs["mean"] <= res_bs["upper"]).all()
+    assert (abs(res_bs["mean"] - res["mean"]) < 0.03).all()
+    assert (abs(res_bs["upper"] - res["upper"]) < 0.03).all()
+    with pytest.raises(ValueError):
+        calculate_bootstrap_ci_grouped(df, "country", "converted", percentiles=[0.5])
+
+
+def test_calculate_bootstrap_ci_grouped_constant_groups():
+    # groups with no variance give no variance in their bootstraps
+    df = pd.DataFrame({"g": [2, 1, 2, 1, 2], "v": [5.0, 1.0, 5.0, 1.0, 5.0]})
+    res = calculate_bootstrap_ci_grouped(df, "g", "v", repeats=50, seed=0)
+    np.testing.assert_array_equal(res.loc[1].to_numpy(), [1.0, 1.0, 1.0])
+    np.testing.assert_array_equal(res.loc[2].to_numpy(), [5.0, 5.0, 5.0])
+    res = calculate_bootstrap_ci_grouped(df, "g", "v", repeats=50, agg="sum", seed=0)
+    assert list(res.columns) == ["lower", "sum", "upper"]
+    np.testing.assert_array_equal(res.loc[2].to_numpy(), [15.0, 15.0, 15.0])
+
+
+def test_compare_proportions():
+    rng = np.random.default_rng(0)
+    trials_c = rng.integers(1_000, 10_000, 400)
+    trials_t = rng.integers(1_000, 10_000, 400)
+    res = compare_proportions(
+        rng.binomial(trials_c, 0.1),
+        trials_c,
+        rng.binomial(trials_t, 0.1),
+        trials_t,
+        seed=0,
+    )
+    assert list(res.columns) == [
+        "experiment",
+        "measure",
+        "method",
+        "lower",
+        "estimate",
+        "upper",
+    ]
+    assert res.shape == (400 * 4, 6)
+    assert (res["lower"] <= res["estimate"]).all()
+    assert (res["estimate"] <= res["upper"]).all()
+    # no real effect, so ~95% of intervals cover 0 difference and a ratio of 1
+    diff = res[res.measure == "difference"]
+    ratio = res[res.measure == "ratio"]
+    assert 0.9 < ((diff.lower < 0) & (diff.upper > 0)).mean()
+    assert 0.9 < ((ratio.lower < 1) & (ratio.upper > 1)).mean()
+
+    # the difference CI matches differencing `calculate_ci` by hand
+    res = compare_proportions([100], [1_000], [150], [1_000], bootstrap=False)
+    res = res.set_index("measure")
+    lower_c, mean_c, upper_c = calculate_ci(np.repeat([1, 0], [100, 900]))
+    lower_t, mean_t, upper_t = calculate_ci(np.repeat([1, 0], [150, 850]))
+    half_width = np.hypot(upper_c - mean_c, upper_t - mean_t)
+    assert res.loc["difference", "estimate"] == pytest.approx(0.05)
+    assert res.loc["difference", "upper"] == pytest.approx(0.05 + half_width, 1e-4)
+    assert res.loc["ratio", "estimate"] == pytest.approx(1.5)
+
+
+def test_compare_means():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "experiment": np.repeat(["x", "y", "z"], 2_000),
+            "arm": np.tile(["control", "treatment"], 3_000),
+            "value": rng.exponential(2.0, 6_000),
+        }
+    )
+    df.loc[(df.experiment == "y") & (df.arm == "treatment"), "value"] += 1
+    # z has no treatment rows
+    df = df[~((df.experiment == "z") & (df.arm == "treatment"))]
+    res = compare_means(df, "experiment", "arm", "value", seed=0)
+    res = res.set_index(["experiment", "measure", "method"])
+    for method in ["analytic", "bootstrap"]:
+        x_diff = res.loc[("x", "difference", method)]
+        assert x_diff.lower < 0 < x_diff.upper
+        y_diff = res.loc[("y", "difference", method)]
+        assert 0.7 < y_diff.lower < 1 < y_diff.upper < 1.3
+        y_ratio = res.loc[("y", "ratio", method)]
+        assert 1.3 < y_ratio.lower < y_ratio.estimate < y_ratio.upper < 1.7
+        assert res.loc[("z", "difference", method)].isna().all()
+
+
+def test_calculate_bootstrap_ci_grouped_missing_keys():
+    # rows with a NaN key are dropped, as calculate_ci_grouped does
+    df = pd.DataFrame(
+        {"g": ["a", None, "b", "a", np.nan, "b"], "v": [1.0, 0.5, 0.0, 1.0, 0.5, 0.0]}
+    )
+    res = calculate_bootstrap_ci_grouped(df, "g", "v", repeats=50, seed=0)
+    assert list(res.index) == list(calculate_ci_grouped(df, "g", "v").index)
+    np.testing.assert_array_equal(res.loc["a"].to_numpy(), [1.0, 1.0, 1.0])
+    np.testing.assert_array_equal(res.loc["b"].to_numpy(), [0.0, 0.0, 0.0])
+
+
+def test_compare_missing_experiments_and_arms(recwarn):
+    # an experiment with 0 control trials gives NaNs without warnings
+    res = compare_proportions([10, 0], [100, 0], [12, 5], [100, 50], seed=0)
+    assert res[res.experiment == 1][["lower", "upper"]].isna().all().all()
+    assert res[res.experiment == 0][["lower", "upper"]].notna().all().all()
+
+    # rows with a NaN experiment are dropped, with or without the bootstrap
+    df = pd.DataFrame(
+        {
+            "experiment": ["x", "x", None, None] * 50,
+            "arm": ["control", "treatment"] * 100,
+            "value": np.arange(200.0),
+        }
+    )
+    res = compare_means(df, "experiment", "arm", "value", repeats=100, seed=0)
+    analytic = compare_means(df, "experiment", "arm", "value", bootstrap=False)
+    assert res["experiment"].unique().tolist() == ["x"]
+    assert analytic["experiment"].unique().tolist() == ["x"]
+    assert res.shape[0] == 2 * analytic.shape[0]
+    assert not [w for w in recwarn if issubclass(w.category, RuntimeWarning)]